@@ -1,23 +1,48 @@
+import time
+IMPORT_START = time.perf_counter()
+
 import pygame
 import random
 import math
 import json
 import os
+import struct
+import sys
+import argparse
+import platform
+import tracemalloc
+import hashlib
+import itertools
+import sqlite3
+import zlib
+import threading
+import numpy as np
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 
 # --- Game Constants ---
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
-FPS = 60
+FPS = 60  # simulation ticks per second
+MAX_RENDER_FPS = 240  # 0 renders as fast as the display allows
+MAX_TICKS_PER_FRAME = 5
+INTERPOLATE = True
+DIRTY_RECTS = False  # push only changed regions to the display instead of flipping
+DIRTY_BACKGROUND_TICKS = 15  # in dirty-rect mode, ticks between background scroll updates
 PLAYER_SIZE = 30
 OBSTACLE_SIZE = 40
 REWARD_SIZE = 25
 POWERUP_SIZE = 30
+BOSS_SIZE = 80
 PLAYER_SPEED = 7
 INITIAL_SCROLL_SPEED = 3
 SPEED_INCREASE_RATE = 0.01
 SPAWN_INTERVAL_MIN = 160
 SPAWN_INTERVAL_MAX = 240
 BOSS_SPAWN_SCORE = 500
+BOSS_HEALTH_SCALE = 1.0  # multiplies every boss's health in entities.json
+BOSS_SPEED_SCALE = 1.0  # multiplies every boss's speed in entities.json
 
 # Colors
 WHITE = (255, 255, 255)
@@ -33,18 +58,173 @@ CYAN = (0, 255, 255)
 PINK = (255, 20, 147)
 GOLD = (255, 215, 0)
 
+# --- Startup Profiling ---
+class StartupProfiler:
+    """Records how long each startup phase took"""
+    def __init__(self):
+        self.phases = []
+        self.marks = []
+        self.exit_after_first_frame = False
+        
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as one startup phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+            
+    def record(self, name, seconds):
+        self.phases.append((name, seconds * 1000))
+        
+    def mark(self, name):
+        """Note a milestone, measured from the start of the import"""
+        self.marks.append((name, (time.perf_counter() - IMPORT_START) * 1000))
+        
+    def report(self):
+        """Phase timings followed by milestones"""
+        lines = [f"{name:18} {ms:8.1f} ms" for name, ms in self.phases]
+        lines += [f"{name:18} {ms:8.1f} ms after import started" for name, ms in self.marks]
+        return "\n".join(lines)
+
+startup_profiler = StartupProfiler()
+
 # --- Pygame Initialization ---
-pygame.init()
-pygame.mixer.init()
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Enhanced Space Runner")
-clock = pygame.time.Clock()
-font_path = pygame.font.match_font('dejavusansmono')
-font = pygame.font.Font(font_path, 36)
-small_font = pygame.font.Font(font_path, 24)
-tiny_font = pygame.font.Font(font_path, 18)
+# The window, clock, fonts and mixer are created on first use through these
+# accessors, so importing the module (or running the simulation headless)
+# never opens a window or an audio device.
+FONT_NAME = 'dejavusansmono'
+FONT_SIZES = {'large': 36, 'small': 24, 'tiny': 18}
+
+screen = None
+clock = None
+fonts = {}
+font_path = None
+sound_manager = None
+
+def get_screen():
+    """The game window, opened on first call"""
+    global screen
+    if screen is None:
+        with startup_profiler.phase('display'):
+            pygame.display.init()
+            screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Enhanced Space Runner")
+    return screen
+
+def get_clock():
+    """The shared frame clock"""
+    global clock
+    if clock is None:
+        clock = pygame.time.Clock()
+    return clock
+
+def get_font(size):
+    """The game font at one of the FONT_SIZES, loaded on first use"""
+    global font_path
+    game_font = fonts.get(size)
+    if game_font is None:
+        with startup_profiler.phase(f'font {size}'):
+            if not pygame.font.get_init():
+                pygame.font.init()
+                font_path = pygame.font.match_font(FONT_NAME)
+            game_font = pygame.font.Font(font_path, FONT_SIZES[size])
+        fonts[size] = game_font
+    return game_font
+
+def get_sound_manager():
+    """The sound manager, starting the mixer and loading sounds on first call"""
+    global sound_manager
+    if sound_manager is None:
+        with startup_profiler.phase('mixer'):
+            try:
+                pygame.mixer.init()
+            except pygame.error:
+                pass
+        with startup_profiler.phase('sounds'):
+            sound_manager = SoundManager()
+    return sound_manager
+
+def play_sound(sound_name):
+    """Play a sound effect"""
+    get_sound_manager().play(sound_name)
 
 # --- Sound System ---
+SOUND_SAMPLE_RATE = 22050
+SOUND_AMPLITUDE = 4096
+SOUND_ATTACK = 0.005
+SOUND_RELEASE = 0.02
+SOUND_CACHE_DIR = 'sound_cache'
+
+# name -> (frequency, duration, waveform)
+SOUND_SPECS = {
+    'coin': (440, 0.1, 'sine'),
+    'powerup': (880, 0.15, 'sine'),
+    'explosion': (110, 0.2, 'sine'),
+    'boss_appear': (220, 0.3, 'sine'),
+    'achievement': (660, 0.2, 'sine'),
+    'levelup': (550, 0.25, 'sine'),
+}
+
+def synthesize_tone(frequency, duration, waveform='sine', attack=SOUND_ATTACK, release=SOUND_RELEASE,
+                    sample_rate=SOUND_SAMPLE_RATE, channels=2):
+    """Build 16-bit PCM samples for a tone with a linear attack/release envelope"""
+    n_samples = int(round(duration * sample_rate))
+    phase = frequency * np.arange(n_samples) / sample_rate
+    if waveform == 'sine':
+        wave = np.sin(2 * np.pi * phase)
+    elif waveform == 'square':
+        wave = np.where(phase % 1 < 0.5, 1.0, -1.0)
+    elif waveform == 'triangle':
+        wave = 4 * np.abs(phase % 1 - 0.5) - 1
+    elif waveform == 'saw':
+        wave = 2 * (phase % 1) - 1
+    elif waveform == 'noise':
+        wave = np.random.default_rng(int(frequency)).uniform(-1, 1, n_samples)
+    else:
+        raise ValueError(f"unknown waveform {waveform!r}")
+    
+    envelope = np.ones(n_samples)
+    attack_samples = min(int(attack * sample_rate), n_samples)
+    release_samples = min(int(release * sample_rate), n_samples)
+    if attack_samples:
+        envelope[:attack_samples] = np.linspace(0, 1, attack_samples)
+    if release_samples:
+        envelope[-release_samples:] *= np.linspace(1, 0, release_samples)
+    
+    samples = (SOUND_AMPLITUDE * wave * envelope).astype(np.int16)
+    if channels == 1:
+        return samples
+    return np.ascontiguousarray(np.repeat(samples[:, None], channels, axis=1))
+
+def load_tone(frequency, duration, waveform='sine', channels=2, cache_dir=SOUND_CACHE_DIR):
+    """Return tone samples from the on-disk cache, synthesizing and caching them on a miss"""
+    params = (frequency, duration, waveform, SOUND_ATTACK, SOUND_RELEASE, SOUND_SAMPLE_RATE, SOUND_AMPLITUDE, channels)
+    key = hashlib.sha1(repr(params).encode('utf-8')).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"tone_{key}.npy")
+    n_samples = int(round(duration * SOUND_SAMPLE_RATE))
+    shape = (n_samples,) if channels == 1 else (n_samples, channels)
+    # A missing, truncated or mismatched file is a miss and gets rewritten below
+    try:
+        samples = np.load(path)
+        if samples.dtype == np.int16 and samples.shape == shape:
+            return samples
+    except (OSError, ValueError, EOFError):
+        pass
+    samples = synthesize_tone(frequency, duration, waveform, channels=channels)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, samples)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+    return samples
+
 class SoundManager:
     """Manages all game sounds"""
     def __init__(self):
@@ -54,33 +234,18 @@ class SoundManager:
         self.create_sounds()
         
     def create_sounds(self):
-        """Create simple beep sounds using pygame.mixer"""
-        # Create sound effects programmatically
-        try:
-            # Coin collect sound
-            self.sounds['coin'] = self.create_tone(440, 0.1)
-            # Power-up sound
-            self.sounds['powerup'] = self.create_tone(880, 0.15)
-            # Explosion sound
-            self.sounds['explosion'] = self.create_tone(110, 0.2)
-            # Boss appear sound
-            self.sounds['boss_appear'] = self.create_tone(220, 0.3)
-            # Achievement sound
-            self.sounds['achievement'] = self.create_tone(660, 0.2)
-            # Level up sound
-            self.sounds['levelup'] = self.create_tone(550, 0.25)
-        except:
-            pass
-    
-    def create_tone(self, frequency, duration):
+        """Load the synthesized sound effects; one that fails to load stays silent on its own"""
+        mixer_settings = pygame.mixer.get_init()
+        channels = mixer_settings[2] if mixer_settings else 2
+        for name, (frequency, duration, waveform) in SOUND_SPECS.items():
+            try:
+                self.sounds[name] = self.create_tone(frequency, duration, waveform, channels)
+            except:
+                pass
+    
+    def create_tone(self, frequency, duration, waveform='sine', channels=2):
         """Create a simple tone"""
-        sample_rate = 22050
-        n_samples = int(round(duration * sample_rate))
-        buf = []
-        for i in range(n_samples):
-            value = int(4096 * math.sin(2 * math.pi * frequency * i / sample_rate))
-            buf.append([value, value])
-        sound = pygame.sndarray.make_sound(buf)
+        sound = pygame.sndarray.make_sound(load_tone(frequency, duration, waveform, channels))
         sound.set_volume(self.sfx_volume)
         return sound
     
@@ -92,18 +257,18 @@ class SoundManager:
             except:
                 pass
 
-sound_manager = SoundManager()
-
 # --- Achievement System ---
+# Each achievement unlocks once the counter it watches reaches its requirement.
+# Counters: score, level, treasures (this run), total_coins, bosses_defeated, powerups_collected (lifetime)
 ACHIEVEMENTS = {
-    'first_blood': {'name': 'First Blood', 'desc': 'Score 100 points', 'requirement': 100, 'icon': '🎯'},
-    'coin_collector': {'name': 'Coin Collector', 'desc': 'Collect 50 coins total', 'requirement': 50, 'icon': '💰'},
-    'survivor': {'name': 'Survivor', 'desc': 'Score 500 points', 'requirement': 500, 'icon': '🛡️'},
-    'boss_slayer': {'name': 'Boss Slayer', 'desc': 'Defeat a boss', 'requirement': 1, 'icon': '⚔️'},
-    'millionaire': {'name': 'Millionaire', 'desc': 'Score 1000 points', 'requirement': 1000, 'icon': '👑'},
-    'power_user': {'name': 'Power User', 'desc': 'Collect 10 power-ups', 'requirement': 10, 'icon': '⚡'},
-    'treasure_hunter': {'name': 'Treasure Hunter', 'desc': 'Collect 5 treasure chests', 'requirement': 5, 'icon': '📦'},
-    'speed_demon': {'name': 'Speed Demon', 'desc': 'Reach speed level 10', 'requirement': 10, 'icon': '🚀'},
+    'first_blood': {'name': 'First Blood', 'desc': 'Score 100 points', 'counter': 'score', 'requirement': 100, 'icon': '🎯'},
+    'coin_collector': {'name': 'Coin Collector', 'desc': 'Collect 50 coins total', 'counter': 'total_coins', 'requirement': 50, 'icon': '💰'},
+    'survivor': {'name': 'Survivor', 'desc': 'Score 500 points', 'counter': 'score', 'requirement': 500, 'icon': '🛡️'},
+    'boss_slayer': {'name': 'Boss Slayer', 'desc': 'Defeat a boss', 'counter': 'bosses_defeated', 'requirement': 1, 'icon': '⚔️'},
+    'millionaire': {'name': 'Millionaire', 'desc': 'Score 1000 points', 'counter': 'score', 'requirement': 1000, 'icon': '👑'},
+    'power_user': {'name': 'Power User', 'desc': 'Collect 10 power-ups', 'counter': 'powerups_collected', 'requirement': 10, 'icon': '⚡'},
+    'treasure_hunter': {'name': 'Treasure Hunter', 'desc': 'Collect 5 treasure chests', 'counter': 'treasures', 'requirement': 5, 'icon': '📦'},
+    'speed_demon': {'name': 'Speed Demon', 'desc': 'Reach speed level 10', 'counter': 'level', 'requirement': 10, 'icon': '🚀'},
 }
 
 # --- Game State Variables ---
@@ -112,18 +277,216 @@ coins = 0
 unlocked_skins = ["default"]
 current_skin = "default"
 achievements_unlocked = []
-stats = {
-    'total_coins': 0,
-    'bosses_defeated': 0,
-    'powerups_collected': 0,
-    'treasures_collected': 0,
-    'max_speed_level': 0
-}
+
+def new_stats():
+    """Fresh lifetime statistics"""
+    return {'total_coins': 0, 'bosses_defeated': 0, 'powerups_collected': 0, 'treasures_collected': 0, 'max_speed_level': 0}
+
+stats = new_stats()
 
 # --- Save/Load System ---
+SAVE_VERSION = 2
+SAVE_BINARY = True  # False writes readable JSON instead
+SAVE_JSON_PATH = 'space_runner_save.json'
+SAVE_PATH = 'space_runner_save.dat' if SAVE_BINARY else SAVE_JSON_PATH
+SAVE_BACKUP_PATH = SAVE_PATH + '.bak'
+SAVE_COALESCE_SECONDS = 0.25  # saves requested within this window are written once
+
+# Binary saves: header, fixed-size numbers, then length-prefixed strings
+SAVE_MAGIC = b'SRSV'
+SAVE_HEADER = struct.Struct('<4sHI')  # magic, version, CRC-32 of the rest
+SAVE_NUMBERS = struct.Struct('<7I')  # high score, coins, then the STATS_FIELDS
+STATS_FIELDS = list(new_stats())
+
+def new_save_data():
+    """The defaults for every save field"""
+    return {
+        'version': SAVE_VERSION,
+        'high_score': 0,
+        'coins': 0,
+        'unlocked_skins': ["default"],
+        'current_skin': "default",
+        'achievements': [],
+        'stats': new_stats(),
+    }
+
+def migrate_v1(data):
+    """Version 1 was the unversioned JSON save, which could lack stats or some of their fields"""
+    stats = data.get('stats', {})
+    if not isinstance(stats, dict):
+        raise ValueError("save stats is not an object")
+    data['stats'] = {**new_stats(), **stats}
+    return data
+
+# SAVE_MIGRATIONS[n] turns version n data into version n + 1
+SAVE_MIGRATIONS = {
+    1: migrate_v1,
+}
+
+def migrate_save(data):
+    """Bring save data of any older version up to SAVE_VERSION"""
+    version = data.get('version', 1)
+    if version > SAVE_VERSION:
+        raise ValueError(f"save version {version} is newer than this game ({SAVE_VERSION})")
+    while version < SAVE_VERSION:
+        data = SAVE_MIGRATIONS[version](data)
+        version += 1
+    data = {**new_save_data(), **data, 'version': SAVE_VERSION}
+    check_save(data)
+    return data
+
+def is_save_number(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value < 2 ** 32
+
+def is_save_string(value):
+    return isinstance(value, str) and len(value.encode('utf-8')) < 256
+
+def check_save(data):
+    """Raise ValueError unless every field has the type (and range) encode_save can store"""
+    for field in ('high_score', 'coins'):
+        if not is_save_number(data[field]):
+            raise ValueError(f"save {field} is not a number")
+    if not is_save_string(data['current_skin']):
+        raise ValueError("save current_skin is not a string")
+    for field in ('unlocked_skins', 'achievements'):
+        if not isinstance(data[field], list) or not all(is_save_string(value) for value in data[field]):
+            raise ValueError(f"save {field} is not a list of strings")
+    stats = data['stats']
+    if not isinstance(stats, dict) or not all(is_save_number(stats.get(field)) for field in STATS_FIELDS):
+        raise ValueError("save stats are not all numbers")
+
+def pack_strings(strings):
+    """A count followed by length-prefixed UTF-8 strings"""
+    encoded = [text.encode('utf-8') for text in strings]
+    return struct.pack('<H', len(encoded)) + b''.join(struct.pack('<B', len(raw)) + raw for raw in encoded)
+
+def unpack_strings(body, offset):
+    """Inverse of pack_strings; returns the strings and the offset after them"""
+    (count,) = struct.unpack_from('<H', body, offset)
+    offset += 2
+    strings = []
+    for _ in range(count):
+        length = body[offset]
+        strings.append(body[offset + 1:offset + 1 + length].decode('utf-8'))
+        offset += 1 + length
+    return strings, offset
+
+def encode_save(data, binary=SAVE_BINARY):
+    """Serialise current-version save data"""
+    if not binary:
+        return json.dumps(data).encode('utf-8')
+    stats = data['stats']
+    body = (SAVE_NUMBERS.pack(data['high_score'], data['coins'], *(stats[field] for field in STATS_FIELDS))
+            + pack_strings([data['current_skin']])
+            + pack_strings(data['unlocked_skins'])
+            + pack_strings(data['achievements']))
+    return SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, zlib.crc32(body)) + body
+
+def decode_save(raw):
+    """Parse a binary or JSON save of any version into current-version data"""
+    if not raw.startswith(SAVE_MAGIC):
+        data = json.loads(raw.decode('utf-8'))
+        if not isinstance(data, dict):
+            raise ValueError("save is not a JSON object")
+        return migrate_save(data)
+    
+    magic, version, checksum = SAVE_HEADER.unpack_from(raw)
+    body = raw[SAVE_HEADER.size:]
+    if zlib.crc32(body) != checksum:
+        raise ValueError("save checksum mismatch")
+    if version != SAVE_VERSION:
+        # Only one binary layout exists so far; older ones would be parsed here and migrated
+        raise ValueError(f"unsupported binary save version {version}")
+    numbers = SAVE_NUMBERS.unpack_from(body)
+    offset = SAVE_NUMBERS.size
+    (current_skin,), offset = unpack_strings(body, offset)
+    unlocked_skins, offset = unpack_strings(body, offset)
+    achievements, offset = unpack_strings(body, offset)
+    return {
+        'version': version,
+        'high_score': numbers[0],
+        'coins': numbers[1],
+        'unlocked_skins': unlocked_skins,
+        'current_skin': current_skin,
+        'achievements': achievements,
+        'stats': dict(zip(STATS_FIELDS, numbers[2:])),
+    }
+
+class SaveWorker(threading.Thread):
+    """Writes saves on a background thread, keeping only the newest pending one"""
+    def __init__(self, path=SAVE_PATH, backup_path=SAVE_BACKUP_PATH):
+        super().__init__(name="save-worker", daemon=True)
+        self.path = path
+        self.backup_path = backup_path
+        self.condition = threading.Condition()
+        self.pending = None
+        self.writing = False
+        self.written_mtime = None
+        
+    def request(self, payload):
+        """Queue a save, replacing any that has not been written yet"""
+        with self.condition:
+            self.pending = payload
+            self.condition.notify_all()
+            
+    def flush(self):
+        """Block until every requested save is on disk"""
+        with self.condition:
+            while self.pending is not None or self.writing:
+                self.condition.wait()
+                
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+            # Let a burst of saves (e.g. game over followed by a purchase) collapse into one write
+            time.sleep(SAVE_COALESCE_SECONDS)
+            with self.condition:
+                payload, self.pending = self.pending, None
+                self.writing = True
+            try:
+                self.write(payload)
+            except OSError as e:
+                print(f"Could not save game: {e}")
+            finally:
+                with self.condition:
+                    self.writing = False
+                    self.condition.notify_all()
+                    
+    def write(self, payload):
+        """Write to a temporary file and rename it into place, keeping the previous save as a backup"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(self.path):
+            os.replace(self.path, self.backup_path)
+        os.replace(tmp_path, self.path)
+        self.written_mtime = os.stat(self.path).st_mtime_ns
+
+save_worker = None
+
+def get_save_worker():
+    """Return the save thread, starting it on first use"""
+    global save_worker
+    if save_worker is None:
+        save_worker = SaveWorker()
+        save_worker.start()
+    return save_worker
+
+def flush_saves():
+    """Wait for pending saves and run records before exiting"""
+    if save_worker is not None:
+        save_worker.flush()
+    if run_history is not None:
+        run_history.flush()
+
 def save_game_data():
-    """Save game progress"""
+    """Save game progress in the background"""
     data = {
+        'version': SAVE_VERSION,
         'high_score': high_score,
         'coins': coins,
         'unlocked_skins': unlocked_skins,
@@ -131,52 +494,360 @@ def save_game_data():
         'achievements': achievements_unlocked,
         'stats': stats
     }
-    with open('space_runner_save.json', 'w') as f:
-        json.dump(data, f)
+    # Serialise now so the thread never sees the lists change under it
+    get_save_worker().request(encode_save(data))
 
-def load_game_data():
-    """Load game progress"""
-    global high_score, coins, unlocked_skins, current_skin, achievements_unlocked, stats
+def read_save_file(path):
+    """Current-version save data, or None if the file is missing or unreadable"""
     try:
-        if os.path.exists('space_runner_save.json'):
-            with open('space_runner_save.json', 'r') as f:
-                data = json.load(f)
-                high_score = data.get('high_score', 0)
-                coins = data.get('coins', 0)
-                unlocked_skins = data.get('unlocked_skins', ["default"])
-                current_skin = data.get('current_skin', "default")
-                achievements_unlocked = data.get('achievements', [])
-                stats = data.get('stats', {'total_coins': 0, 'bosses_defeated': 0, 'powerups_collected': 0, 'treasures_collected': 0, 'max_speed_level': 0})
-    except:
-        pass
+        with open(path, 'rb') as f:
+            return decode_save(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, struct.error) as e:
+        print(f"Ignoring unreadable save {path}: {e}")
+        return None
 
-def check_achievement(achievement_id, value):
-    """Check if achievement should be unlocked"""
-    if achievement_id not in achievements_unlocked:
-        if value >= ACHIEVEMENTS[achievement_id]['requirement']:
-            achievements_unlocked.append(achievement_id)
-            sound_manager.play('achievement')
-            return True
-    return False
+profile_mtime = None  # modification time of the save when it was last loaded
+
+def save_file_mtime(path=SAVE_PATH):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def refresh_profile():
+    """Reload progress only if the save changed on disk since this game last read or wrote it"""
+    mtime = save_file_mtime()
+    if mtime == profile_mtime or (save_worker is not None and mtime == save_worker.written_mtime):
+        return
+    load_game_data()
+
+def load_game_data():
+    """Load game progress, falling back to the backup and then to an older JSON save"""
+    global high_score, coins, unlocked_skins, current_skin, achievements_unlocked, stats, profile_mtime
+    profile_mtime = save_file_mtime()
+    for path in dict.fromkeys([SAVE_PATH, SAVE_BACKUP_PATH, SAVE_JSON_PATH]):
+        data = read_save_file(path)
+        if data is not None:
+            break
+    else:
+        return
+    high_score = data['high_score']
+    coins = data['coins']
+    unlocked_skins = data['unlocked_skins']
+    current_skin = data['current_skin']
+    achievements_unlocked = data['achievements']
+    stats = data['stats']
+    if path == SAVE_JSON_PATH != SAVE_PATH:
+        # Convert the old save on first load; the JSON file is left as it was
+        save_game_data()
+
+class AchievementEngine:
+    """Unlocks achievements as the counters they subscribe to change"""
+    def __init__(self, unlocked=None):
+        # The list is what gets saved; the set answers "is it unlocked?"
+        self.unlocked = unlocked if unlocked is not None else achievements_unlocked
+        self.unlocked_index = set(self.unlocked)
+        # counter -> locked (requirement, id) pairs, highest requirement first
+        self.subscriptions = {}
+        for achievement_id, achievement in ACHIEVEMENTS.items():
+            if achievement_id not in self.unlocked_index:
+                self.subscriptions.setdefault(achievement['counter'], []).append((achievement['requirement'], achievement_id))
+        for waiting in self.subscriptions.values():
+            waiting.sort(reverse=True)
+            
+    def publish(self, counter, value):
+        """A counter changed; return the ids of the achievements it unlocked"""
+        waiting = self.subscriptions.get(counter)
+        if not waiting or value < waiting[-1][0]:
+            return []
+        unlocked = []
+        while waiting and value >= waiting[-1][0]:
+            achievement_id = waiting.pop()[1]
+            self.unlocked.append(achievement_id)
+            self.unlocked_index.add(achievement_id)
+            unlocked.append(achievement_id)
+        return unlocked
+    
+    def is_unlocked(self, achievement_id):
+        return achievement_id in self.unlocked_index
+
+# --- Run History ---
+RUNS_DB_PATH = 'space_runner_runs.db'
+RUN_BATCH_SECONDS = 1.0  # runs recorded within this window are inserted in one transaction
+RUN_FIELDS = ['played_at', 'day', 'skin', 'seed', 'score', 'level', 'coins', 'duration_ms', 'bosses_defeated', 'powerups']
+RUNS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    played_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    skin TEXT NOT NULL,
+    seed INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    coins INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    bosses_defeated INTEGER NOT NULL,
+    powerups INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_by_score ON runs (score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_skin ON runs (skin, score DESC);
+CREATE INDEX IF NOT EXISTS runs_by_day ON runs (day, score DESC);
+"""
+
+def run_record(state):
+    """The run-history row for a finished game"""
+    played_at = time.time()
+    return {
+        'played_at': played_at,
+        'day': time.strftime('%Y-%m-%d', time.localtime(played_at)),
+        'skin': state.player.skin,
+        'seed': state.seed,
+        'score': state.score,
+        'level': state.level,
+        'coins': state.coins_earned,
+        'duration_ms': int(state.time_ms),
+        'bosses_defeated': state.game_bosses_defeated,
+        'powerups': state.game_powerups_collected,
+    }
+
+class RunHistory(threading.Thread):
+    """Every finished run in SQLite, inserted in batches on a background thread"""
+    def __init__(self, path=RUNS_DB_PATH):
+        super().__init__(name="run-history", daemon=True)
+        self.path = path
+        self.condition = threading.Condition()
+        self.pending = []
+        self.in_flight = []
+        # (n, skin, day) -> best runs for that query, kept current as runs are recorded
+        self.cache = {}
+        # Reads use this connection on the calling thread; the writer opens its own.
+        # Without a usable database the game goes on with an empty leaderboard
+        self.enabled = True
+        try:
+            self.connection = sqlite3.connect(path)
+            self.connection.executescript(RUNS_SCHEMA)
+        except sqlite3.Error as e:
+            self.disable(e)
+            
+    def disable(self, error):
+        """Stop recording and reading runs after a database error"""
+        print(f"Run history disabled: {error}")
+        self.enabled = False
+        self.cache = {}
+        
+    def record(self, run):
+        """Queue a finished run and add it to the cached leaderboards"""
+        if not self.enabled:
+            return
+        with self.condition:
+            self.pending.append(run)
+            self.condition.notify_all()
+        for (n, skin, day), runs in self.cache.items():
+            if skin in (None, run['skin']) and day in (None, run['day']):
+                runs.append(run)
+                runs.sort(key=lambda r: r['score'], reverse=True)
+                del runs[n:]
+                
+    def top_runs(self, n=10, skin=None, day=None):
+        """The n best runs, optionally only with one skin or on one day ('YYYY-MM-DD')"""
+        if not self.enabled:
+            return []
+        key = (n, skin, day)
+        runs = self.cache.get(key)
+        if runs is None:
+            conditions, params = [], []
+            if skin is not None:
+                conditions.append("skin = ?")
+                params.append(skin)
+            if day is not None:
+                conditions.append("day = ?")
+                params.append(day)
+            where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+            try:
+                rows = self.connection.execute(
+                    f"SELECT {', '.join(RUN_FIELDS)} FROM runs{where} ORDER BY score DESC, id LIMIT ?", params + [n])
+                runs = [dict(zip(RUN_FIELDS, row)) for row in rows]
+            except sqlite3.Error as e:
+                self.disable(e)
+                return []
+            # Add runs the writer has not committed yet, rather than waiting for it
+            stored = {run['played_at'] for run in runs}
+            with self.condition:
+                unwritten = self.in_flight + self.pending
+            for run in unwritten:
+                if skin in (None, run['skin']) and day in (None, run['day']) and run['played_at'] not in stored:
+                    runs.append(run)
+            runs.sort(key=lambda r: r['score'], reverse=True)
+            runs = self.cache[key] = runs[:n]
+        return runs
+    
+    def flush(self):
+        """Block until every recorded run is in the database"""
+        if not self.is_alive():
+            return
+        with self.condition:
+            while self.pending or self.in_flight:
+                self.condition.wait()
+                
+    def run(self):
+        connection = sqlite3.connect(self.path)
+        insert = f"INSERT INTO runs ({', '.join(RUN_FIELDS)}) VALUES ({', '.join('?' * len(RUN_FIELDS))})"
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+            time.sleep(RUN_BATCH_SECONDS)
+            with self.condition:
+                self.in_flight, self.pending = self.pending, []
+            try:
+                with connection:
+                    connection.executemany(insert, [tuple(run[field] for field in RUN_FIELDS) for run in self.in_flight])
+            except sqlite3.Error as e:
+                print(f"Could not record runs: {e}")
+            finally:
+                with self.condition:
+                    self.in_flight = []
+                    self.condition.notify_all()
+
+run_history = None
+
+def get_run_history():
+    """Return the run history, opening the database on first use"""
+    global run_history
+    if run_history is None:
+        run_history = RunHistory()
+        if run_history.enabled:
+            run_history.start()
+    return run_history
 
 # --- Particle System ---
-class Particle(pygame.sprite.Sprite):
-    """Visual effect particle"""
-    def __init__(self, x, y, color):
-        super().__init__()
-        self.image = pygame.Surface((4, 4), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, color, (2, 2), 2)
-        self.rect = self.image.get_rect(center=(x, y))
-        self.speedx = random.randint(-5, 5)
-        self.speedy = random.randint(-5, 5)
-        self.lifetime = 30
+PARTICLE_CAPACITY = 2048
+PARTICLE_LIFETIME = 30
+PARTICLE_SIZE = 4
+
+class ParticleSystem:
+    """Fixed-size pool of visual effect particles stored in NumPy arrays"""
+    def __init__(self, capacity=PARTICLE_CAPACITY, seed=None):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.positions = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 2), dtype=np.float32)
+        self.lifetimes = np.zeros(capacity, dtype=np.int16)
+        self.color_ids = np.zeros(capacity, dtype=np.int16)
+        self.color_index = {}
+        self.dots = []
+        # Slots are handed out round-robin; since every particle lives equally
+        # long, a full pool overwrites the oldest particles first.
+        self.next_slot = 0
+        
+    def get_color_id(self, color):
+        """Return the index of the shared dot image for a colour"""
+        color_id = self.color_index.get(color)
+        if color_id is None:
+            dot = pygame.Surface((PARTICLE_SIZE, PARTICLE_SIZE), pygame.SRCALPHA)
+            pygame.draw.circle(dot, color, (PARTICLE_SIZE // 2, PARTICLE_SIZE // 2), PARTICLE_SIZE // 2)
+            color_id = len(self.dots)
+            self.dots.append(dot)
+            self.color_index[color] = color_id
+        return color_id
+    
+    def emit(self, x, y, color, count=10):
+        """Create a particle explosion effect"""
+        slots = (self.next_slot + np.arange(count)) % self.capacity
+        self.next_slot = (self.next_slot + count) % self.capacity
+        self.positions[slots] = (x - PARTICLE_SIZE // 2, y - PARTICLE_SIZE // 2)
+        self.velocities[slots] = self.rng.integers(-5, 6, size=(count, 2))
+        self.lifetimes[slots] = PARTICLE_LIFETIME
+        self.color_ids[slots] = self.get_color_id(color)
         
     def update(self):
-        self.rect.x += self.speedx
-        self.rect.y += self.speedy
-        self.lifetime -= 1
-        if self.lifetime <= 0:
-            self.kill()
+        """Move every live particle and age it by one frame"""
+        alive = self.lifetimes > 0
+        self.positions[alive] += self.velocities[alive]
+        self.lifetimes[alive] -= 1
+        
+    def draw(self, surface):
+        """Blit the shared dot image for every live particle"""
+        alive = np.flatnonzero(self.lifetimes)
+        if alive.size == 0:
+            return
+        dots = self.dots
+        positions = self.positions[alive].astype(np.int32).tolist()
+        surface.blits([(dots[color_id], pos) for color_id, pos in zip(self.color_ids[alive].tolist(), positions)], False)
+        
+    def __len__(self):
+        return int(np.count_nonzero(self.lifetimes))
+        
+    def bounds(self):
+        """Rect covering every live particle, or None"""
+        alive = self.lifetimes > 0
+        if not alive.any():
+            return None
+        positions = self.positions[alive]
+        left, top = positions.min(axis=0)
+        right, bottom = positions.max(axis=0)
+        return pygame.Rect(int(left) - 1, int(top) - 1, int(right - left) + PARTICLE_SIZE + 2, int(bottom - top) + PARTICLE_SIZE + 2)
+
+# --- Skins ---
+SKINS = {
+    "default": {"name": "Classic", "cost": 0},
+    "golden": {"name": "Golden", "cost": 100},
+    "robot": {"name": "Robot", "cost": 200},
+    "alien": {"name": "Alien", "cost": 150},
+}
+SKIN_PREVIEW_SCALE = 3  # the shop shows skins at this multiple of PLAYER_SIZE
+
+# (skin, scale) -> image shared by every player and preview showing that skin
+skin_images = {}
+# skin -> collision mask of its PLAYER_SIZE image
+skin_masks = {}
+
+def draw_skin(image, skin):
+    """Draw a skin onto a PLAYER_SIZE image"""
+    if skin == "default":
+        pygame.draw.circle(image, WHITE, (PLAYER_SIZE // 2, PLAYER_SIZE // 2), PLAYER_SIZE // 2 - 2, 2)
+        pygame.draw.rect(image, GRAY, (0, PLAYER_SIZE // 2, PLAYER_SIZE, PLAYER_SIZE // 2 - 2))
+        pygame.draw.circle(image, GRAY, (PLAYER_SIZE // 2, PLAYER_SIZE // 2), PLAYER_SIZE // 2 - 2)
+        pygame.draw.circle(image, CYAN, (PLAYER_SIZE // 2, PLAYER_SIZE // 2), PLAYER_SIZE // 2 - 5)
+        visor_rect = pygame.Rect(PLAYER_SIZE // 4, PLAYER_SIZE // 4, PLAYER_SIZE // 2, PLAYER_SIZE // 4)
+        pygame.draw.rect(image, BLUE, visor_rect)
+        pygame.draw.line(image, GRAY, (PLAYER_SIZE // 2, 0), (PLAYER_SIZE // 2, 5), 2)
+        pygame.draw.circle(image, GRAY, (PLAYER_SIZE // 2, 0), 2)
+    elif skin == "golden":
+        pygame.draw.circle(image, GOLD, (PLAYER_SIZE // 2, PLAYER_SIZE // 2), PLAYER_SIZE // 2 - 2)
+        pygame.draw.circle(image, YELLOW, (PLAYER_SIZE // 2, PLAYER_SIZE // 2), PLAYER_SIZE // 2 - 5)
+        visor_rect = pygame.Rect(PLAYER_SIZE // 4, PLAYER_SIZE // 4, PLAYER_SIZE // 2, PLAYER_SIZE // 4)
+        pygame.draw.rect(image, ORANGE, visor_rect)
+    elif skin == "robot":
+        pygame.draw.rect(image, GRAY, (5, 5, PLAYER_SIZE - 10, PLAYER_SIZE - 10))
+        pygame.draw.rect(image, RED, (8, 8, 6, 6))
+        pygame.draw.rect(image, RED, (PLAYER_SIZE - 14, 8, 6, 6))
+        pygame.draw.rect(image, CYAN, (10, PLAYER_SIZE - 12, PLAYER_SIZE - 20, 4))
+    elif skin == "alien":
+        pygame.draw.ellipse(image, GREEN, (5, 3, PLAYER_SIZE - 10, PLAYER_SIZE - 6))
+        pygame.draw.circle(image, BLACK, (12, 12), 4)
+        pygame.draw.circle(image, BLACK, (PLAYER_SIZE - 12, 12), 4)
+
+def get_skin_image(skin, scale=1):
+    """Return the shared image of a skin at a multiple of PLAYER_SIZE, drawing it on first use"""
+    image = skin_images.get((skin, scale))
+    if image is None:
+        if scale == 1:
+            image = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE), pygame.SRCALPHA)
+            draw_skin(image, skin)
+        else:
+            image = pygame.transform.smoothscale(get_skin_image(skin), (PLAYER_SIZE * scale, PLAYER_SIZE * scale))
+        skin_images[(skin, scale)] = image
+    return image
+
+def get_skin_mask(skin):
+    """Return the shared collision mask for a skin"""
+    mask = skin_masks.get(skin)
+    if mask is None:
+        mask = skin_masks[skin] = pygame.mask.from_surface(get_skin_image(skin))
+    return mask
 
 # --- Player Class ---
 class Player(pygame.sprite.Sprite):
@@ -184,7 +855,7 @@ class Player(pygame.sprite.Sprite):
     def __init__(self, skin="default"):
         super().__init__()
         self.skin = skin
-        self.image = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE), pygame.SRCALPHA)
+        self.draw_character()
         self.rect = self.image.get_rect()
         self.rect.centerx = 100
         self.rect.centery = SCREEN_HEIGHT // 2
@@ -197,35 +868,11 @@ class Player(pygame.sprite.Sprite):
         self.speed_boost_timer = 0
         self.invincible = False
         self.invincible_timer = 0
-        self.draw_character()
         
     def draw_character(self):
-        """Draw player based on selected skin"""
-        self.image.fill((0, 0, 0, 0))
-        
-        if self.skin == "default":
-            pygame.draw.circle(self.image, WHITE, (PLAYER_SIZE // 2, PLAYER_SIZE // 2), PLAYER_SIZE // 2 - 2, 2)
-            pygame.draw.rect(self.image, GRAY, (0, PLAYER_SIZE // 2, PLAYER_SIZE, PLAYER_SIZE // 2 - 2))
-            pygame.draw.circle(self.image, GRAY, (PLAYER_SIZE // 2, PLAYER_SIZE // 2), PLAYER_SIZE // 2 - 2)
-            pygame.draw.circle(self.image, CYAN, (PLAYER_SIZE // 2, PLAYER_SIZE // 2), PLAYER_SIZE // 2 - 5)
-            visor_rect = pygame.Rect(PLAYER_SIZE // 4, PLAYER_SIZE // 4, PLAYER_SIZE // 2, PLAYER_SIZE // 4)
-            pygame.draw.rect(self.image, BLUE, visor_rect)
-            pygame.draw.line(self.image, GRAY, (PLAYER_SIZE // 2, 0), (PLAYER_SIZE // 2, 5), 2)
-            pygame.draw.circle(self.image, GRAY, (PLAYER_SIZE // 2, 0), 2)
-        elif self.skin == "golden":
-            pygame.draw.circle(self.image, GOLD, (PLAYER_SIZE // 2, PLAYER_SIZE // 2), PLAYER_SIZE // 2 - 2)
-            pygame.draw.circle(self.image, YELLOW, (PLAYER_SIZE // 2, PLAYER_SIZE // 2), PLAYER_SIZE // 2 - 5)
-            visor_rect = pygame.Rect(PLAYER_SIZE // 4, PLAYER_SIZE // 4, PLAYER_SIZE // 2, PLAYER_SIZE // 4)
-            pygame.draw.rect(self.image, ORANGE, visor_rect)
-        elif self.skin == "robot":
-            pygame.draw.rect(self.image, GRAY, (5, 5, PLAYER_SIZE - 10, PLAYER_SIZE - 10))
-            pygame.draw.rect(self.image, RED, (8, 8, 6, 6))
-            pygame.draw.rect(self.image, RED, (PLAYER_SIZE - 14, 8, 6, 6))
-            pygame.draw.rect(self.image, CYAN, (10, PLAYER_SIZE - 12, PLAYER_SIZE - 20, 4))
-        elif self.skin == "alien":
-            pygame.draw.ellipse(self.image, GREEN, (5, 3, PLAYER_SIZE - 10, PLAYER_SIZE - 6))
-            pygame.draw.circle(self.image, BLACK, (12, 12), 4)
-            pygame.draw.circle(self.image, BLACK, (PLAYER_SIZE - 12, 12), 4)
+        """Use the shared image and mask for the selected skin"""
+        self.image = get_skin_image(self.skin)
+        self.mask = get_skin_mask(self.skin)
             
     def update(self):
         """Update player position and power-up timers"""
@@ -257,77 +904,125 @@ class Player(pygame.sprite.Sprite):
             if self.invincible_timer <= 0:
                 self.invincible = False
     
-    def activate_shield(self):
+    def activate_shield(self, duration=300):
         self.shield_active = True
-        self.shield_timer = 300
+        self.shield_timer = duration
         
-    def activate_magnet(self):
+    def activate_magnet(self, duration=360):
         self.magnet_active = True
-        self.magnet_timer = 360
+        self.magnet_timer = duration
         
-    def activate_speed_boost(self):
+    def activate_speed_boost(self, duration=240):
         self.speed_boost_active = True
-        self.speed_boost_timer = 240
+        self.speed_boost_timer = duration
         
     def draw_powerup_indicators(self, surface):
         """Draw active power-up indicators"""
         y_offset = 60
         if self.shield_active:
-            draw_text("SHIELD", tiny_font, CYAN, 70, y_offset)
+            draw_text("SHIELD", get_font('tiny'), CYAN, 70, y_offset, surface)
             y_offset += 25
         if self.magnet_active:
-            draw_text("MAGNET", tiny_font, PURPLE, 70, y_offset)
+            draw_text("MAGNET", get_font('tiny'), PURPLE, 70, y_offset, surface)
             y_offset += 25
         if self.speed_boost_active:
-            draw_text("SPEED", tiny_font, ORANGE, 70, y_offset)
+            draw_text("SPEED", get_font('tiny'), ORANGE, 70, y_offset, surface)
+
+# --- Entity Definitions ---
+ENTITY_DEFS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'entities.json')
+ENTITY_SIZES = {'obstacles': OBSTACLE_SIZE, 'rewards': REWARD_SIZE, 'powerups': POWERUP_SIZE, 'bosses': BOSS_SIZE}
+COLOR_NAMES = {
+    'WHITE': WHITE, 'BLACK': BLACK, 'GRAY': GRAY, 'RED': RED, 'GREEN': GREEN, 'YELLOW': YELLOW,
+    'BLUE': BLUE, 'ORANGE': ORANGE, 'PURPLE': PURPLE, 'CYAN': CYAN, 'PINK': PINK, 'GOLD': GOLD,
+}
+
+# How each draw primitive in the definitions file maps onto pygame.draw
+SHAPE_DRAWERS = {
+    'circle': lambda image, color, shape: pygame.draw.circle(image, color, shape['center'], shape['radius'], shape.get('width', 0)),
+    'rect': lambda image, color, shape: pygame.draw.rect(image, color, shape['rect'], shape.get('width', 0), shape.get('border_radius', 0)),
+    'ellipse': lambda image, color, shape: pygame.draw.ellipse(image, color, shape['rect'], shape.get('width', 0)),
+    'polygon': lambda image, color, shape: pygame.draw.polygon(image, color, shape['points'], shape.get('width', 0)),
+    'arc': lambda image, color, shape: pygame.draw.arc(image, color, shape['rect'], shape['start'], shape['stop'], shape.get('width', 1)),
+    'line': lambda image, color, shape: pygame.draw.line(image, color, shape['start'], shape['end'], shape.get('width', 1)),
+}
+
+def parse_color(value):
+    """A colour from the definitions file: a constant's name or an [r, g, b] list"""
+    if isinstance(value, str):
+        return COLOR_NAMES[value]
+    return tuple(value)
 
-# --- Boss Types ---
+def draw_shapes(size, shapes, tint=None):
+    """Render a list of draw primitives; colour "tint" takes the given tint"""
+    image = pygame.Surface((size, size), pygame.SRCALPHA)
+    for shape in shapes:
+        color = tint if shape['color'] == 'tint' else parse_color(shape['color'])
+        SHAPE_DRAWERS[shape['shape']](image, color, shape)
+    return image
+
+class EntityType:
+    """One entity definition compiled for the hot path; sprites and the entity store refer to it"""
+    def __init__(self, index, size, spec):
+        self.index = index
+        self.name = spec['name']
+        self.size = size
+        self.weight = spec.get('weight', 1)
+        self.points = spec.get('points', 0)
+        self.coins = spec.get('coins', 0)
+        self.treasure = spec.get('treasure', False)
+        self.health = spec.get('health', 1)
+        self.speedx = spec.get('speedx', 0)
+        self.speedy = spec.get('speedy', 0)
+        self.duration = spec.get('duration', 0)
+        # Power-ups call the Player method for their effect, e.g. activate_shield(duration)
+        self.activate = getattr(Player, 'activate_' + spec['effect']) if 'effect' in spec else None
+        # One pre-rendered image per tint, or a single untinted image
+        tints = [parse_color(tint) for tint in spec.get('tints', [])]
+        self.images = [draw_shapes(size, spec['shapes'], tint) for tint in tints] or [draw_shapes(size, spec['shapes'])]
+        self.masks = [pygame.mask.from_surface(image) for image in self.images]
+        # Obstacles fill these with rotation frames and their masks, indexed by angle // OBSTACLE_ROTATION_STEP
+        self.frames = None
+        self.frame_masks = None
+
+def load_entity_defs(path=ENTITY_DEFS_PATH):
+    """Read the definitions file and compile each category into an index-ordered list of EntityType"""
+    with open(path) as f:
+        specs = json.load(f)
+    return {category: [EntityType(index, ENTITY_SIZES[category], spec) for index, spec in enumerate(specs[category])]
+            for category in ENTITY_SIZES}
+
+def spawn_table(entity_types):
+    """Each type repeated by its weight, for a single uniform rng.choice"""
+    return [entity_type for entity_type in entity_types for _ in range(entity_type.weight)]
+
+ENTITY_DEFS = load_entity_defs()
+OBSTACLE_DEFS = ENTITY_DEFS['obstacles']
+REWARD_DEFS = ENTITY_DEFS['rewards']
+POWERUP_DEFS = ENTITY_DEFS['powerups']
+# Bosses appear in this order, then repeat
+BOSS_DEFS = ENTITY_DEFS['bosses']
+OBSTACLE_SPAWN_TABLE = spawn_table(OBSTACLE_DEFS)
+REWARD_SPAWN_TABLE = spawn_table(REWARD_DEFS)
+POWERUP_SPAWN_TABLE = spawn_table(POWERUP_DEFS)
+
+# --- Boss Class ---
 class Boss(pygame.sprite.Sprite):
     """Boss enemy with different types"""
-    def __init__(self, boss_type="alien"):
+    def __init__(self, kind):
         super().__init__()
-        self.boss_type = boss_type
-        self.image = pygame.Surface((80, 80), pygame.SRCALPHA)
+        self.kind = kind
+        self.image = kind.images[0]
+        self.mask = kind.masks[0]
         self.rect = self.image.get_rect()
         self.rect.right = SCREEN_WIDTH + 100
         self.rect.centery = SCREEN_HEIGHT // 2
         
-        if boss_type == "alien":
-            self.health = 5
-            self.speedx = -2
-            self.speedy = 2
-        elif boss_type == "asteroid":
-            self.health = 8
-            self.speedx = -1.5
-            self.speedy = 1.5
-        elif boss_type == "mothership":
-            self.health = 10
-            self.speedx = -1
-            self.speedy = 1
+        self.health = max(1, round(kind.health * BOSS_HEALTH_SCALE))
+        self.speedx = kind.speedx * BOSS_SPEED_SCALE
+        self.speedy = kind.speedy * BOSS_SPEED_SCALE
             
         self.max_health = self.health
         self.shoot_timer = 0
-        self.draw_boss()
-        
-    def draw_boss(self):
-        """Draw boss based on type"""
-        if self.boss_type == "alien":
-            pygame.draw.circle(self.image, RED, (40, 40), 35)
-            pygame.draw.circle(self.image, (150, 0, 0), (40, 40), 30)
-            pygame.draw.circle(self.image, YELLOW, (30, 30), 8)
-            pygame.draw.circle(self.image, YELLOW, (50, 30), 8)
-            pygame.draw.circle(self.image, BLACK, (30, 30), 4)
-            pygame.draw.circle(self.image, BLACK, (50, 30), 4)
-        elif self.boss_type == "asteroid":
-            pygame.draw.circle(self.image, (80, 80, 80), (40, 40), 38)
-            pygame.draw.circle(self.image, (60, 60, 60), (25, 25), 12)
-            pygame.draw.circle(self.image, (60, 60, 60), (55, 30), 8)
-            pygame.draw.circle(self.image, (60, 60, 60), (35, 55), 10)
-        elif self.boss_type == "mothership":
-            pygame.draw.ellipse(self.image, PURPLE, (10, 25, 60, 30))
-            pygame.draw.circle(self.image, (100, 0, 100), (40, 40), 20)
-            pygame.draw.rect(self.image, CYAN, (15, 35, 10, 10))
-            pygame.draw.rect(self.image, CYAN, (55, 35, 10, 10))
         
     def update(self):
         """Update boss movement"""
@@ -345,11 +1040,21 @@ class Boss(pygame.sprite.Sprite):
         return False
 
 class BossProjectile(pygame.sprite.Sprite):
-    """Projectiles fired by boss"""
+    """Projectiles fired by boss; spent ones are reset and fired again"""
+    image_cache = None
+    mask_cache = None
+    
     def __init__(self, x, y):
         super().__init__()
-        self.image = pygame.Surface((15, 15), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, RED, (7, 7), 7)
+        self.reset(x, y)
+        
+    def reset(self, x, y):
+        if BossProjectile.image_cache is None:
+            BossProjectile.image_cache = pygame.Surface((15, 15), pygame.SRCALPHA)
+            pygame.draw.circle(BossProjectile.image_cache, RED, (7, 7), 7)
+            BossProjectile.mask_cache = pygame.mask.from_surface(BossProjectile.image_cache)
+        self.image = BossProjectile.image_cache
+        self.mask = BossProjectile.mask_cache
         self.rect = self.image.get_rect(center=(x, y))
         self.speedx = -5
         
@@ -358,146 +1063,269 @@ class BossProjectile(pygame.sprite.Sprite):
         if self.rect.right < 0:
             self.kill()
 
-# --- Power-up Class ---
-class PowerUp(pygame.sprite.Sprite):
-    """Power-ups that give special abilities"""
-    def __init__(self, power_type):
-        super().__init__()
-        self.power_type = power_type
-        self.image = pygame.Surface((POWERUP_SIZE, POWERUP_SIZE), pygame.SRCALPHA)
-        self.rect = self.image.get_rect()
-        self.rect.right = SCREEN_WIDTH + random.randint(50, 100)
-        self.rect.y = random.randint(0, SCREEN_HEIGHT - POWERUP_SIZE)
-        self.speedx = -INITIAL_SCROLL_SPEED
-        self.draw_powerup()
-        
-    def draw_powerup(self):
-        """Draw power-up based on type"""
-        if self.power_type == "shield":
-            pygame.draw.circle(self.image, CYAN, (POWERUP_SIZE // 2, POWERUP_SIZE // 2), POWERUP_SIZE // 2 - 2, 3)
-            pygame.draw.circle(self.image, CYAN, (POWERUP_SIZE // 2, POWERUP_SIZE // 2), POWERUP_SIZE // 3, 3)
-        elif self.power_type == "magnet":
-            pygame.draw.rect(self.image, PURPLE, (5, 8, POWERUP_SIZE - 10, 8))
-            pygame.draw.arc(self.image, PURPLE, (5, 5, POWERUP_SIZE // 2 - 5, 15), 0, 3.14, 3)
-            pygame.draw.arc(self.image, PURPLE, (POWERUP_SIZE // 2, 5, POWERUP_SIZE // 2 - 5, 15), 0, 3.14, 3)
-        elif self.power_type == "speed":
-            pygame.draw.polygon(self.image, ORANGE, [(5, POWERUP_SIZE // 2), 
-                                                      (POWERUP_SIZE - 5, 5),
-                                                      (POWERUP_SIZE - 5, POWERUP_SIZE - 5)])
-            
-    def update(self, scroll_speed):
-        """Update power-up position"""
-        self.rect.x += -scroll_speed
-        if self.rect.right < 0:
-            self.kill()
+# --- Obstacle Frames ---
+OBSTACLE_ROTATION_STEP = 2
 
-# --- Obstacle Class ---
-class Obstacle(pygame.sprite.Sprite):
-    """Enhanced obstacle with rotation"""
-    def __init__(self, type):
-        super().__init__()
-        self.type = type
-        self.image = pygame.Surface((OBSTACLE_SIZE, OBSTACLE_SIZE), pygame.SRCALPHA)
-        self.original_image = self.image
-        self.rect = self.image.get_rect()
-        self.rect.right = SCREEN_WIDTH + random.randint(50, 100)
-        self.rect.y = random.randint(0, SCREEN_HEIGHT - OBSTACLE_SIZE)
-        self.speedx = -INITIAL_SCROLL_SPEED
-        self.rotation = 0
-        self.draw_obstacle()
-        self.original_image = self.image.copy()
-        
-    def draw_obstacle(self):
-        """Draw obstacle based on type"""
-        if self.type == "asteroid":
-            pygame.draw.circle(self.image, GRAY, (OBSTACLE_SIZE // 2, OBSTACLE_SIZE // 2), OBSTACLE_SIZE // 2)
-            pygame.draw.circle(self.image, (80, 80, 80), (OBSTACLE_SIZE // 4, OBSTACLE_SIZE // 4), OBSTACLE_SIZE // 8)
-        elif self.type == "alien":
-            pygame.draw.polygon(self.image, GREEN, [(OBSTACLE_SIZE // 2, 0), (0, OBSTACLE_SIZE), (OBSTACLE_SIZE, OBSTACLE_SIZE)])
-            pygame.draw.circle(self.image, WHITE, (OBSTACLE_SIZE // 2, OBSTACLE_SIZE // 2), OBSTACLE_SIZE // 8)
-        elif self.type == "black_hole":
-            pygame.draw.circle(self.image, BLACK, (OBSTACLE_SIZE // 2, OBSTACLE_SIZE // 2), OBSTACLE_SIZE // 2)
-            pygame.draw.circle(self.image, PURPLE, (OBSTACLE_SIZE // 2, OBSTACLE_SIZE // 2), OBSTACLE_SIZE // 3, 2)
-        elif self.type == "debris":
-            pygame.draw.rect(self.image, GRAY, (0, 0, OBSTACLE_SIZE, OBSTACLE_SIZE))
-            
-    def update(self, scroll_speed):
-        """Update obstacle position with rotation"""
-        self.rect.x += -scroll_speed
-        self.rotation += 2
-        self.image = pygame.transform.rotate(self.original_image, self.rotation)
-        self.rect = self.image.get_rect(center=self.rect.center)
-        if self.rect.right < 0:
-            self.kill()
+def get_obstacle_frame(kind, angle):
+    """Return the shared obstacle image rotated by angle, rendering it and its mask on first use"""
+    index = angle % 360 // OBSTACLE_ROTATION_STEP
+    if kind.frames is None:
+        kind.frames = [kind.images[0]] + [None] * (360 // OBSTACLE_ROTATION_STEP - 1)
+        kind.frame_masks = [kind.masks[0]] + [None] * (360 // OBSTACLE_ROTATION_STEP - 1)
+    frame = kind.frames[index]
+    if frame is None:
+        frame = kind.frames[index] = pygame.transform.rotate(kind.images[0], index * OBSTACLE_ROTATION_STEP)
+        kind.frame_masks[index] = pygame.mask.from_surface(frame)
+    return frame
 
-# --- Reward Class ---
-class Reward(pygame.sprite.Sprite):
-    """Enhanced reward with coin collection"""
-    def __init__(self, type):
-        super().__init__()
-        self.type = type
-        self.image = pygame.Surface((REWARD_SIZE, REWARD_SIZE), pygame.SRCALPHA)
-        self.rect = self.image.get_rect()
-        self.rect.right = SCREEN_WIDTH + random.randint(50, 100)
-        self.rect.y = random.randint(0, SCREEN_HEIGHT - REWARD_SIZE)
-        self.speedx = -INITIAL_SCROLL_SPEED
-        self.points = 0
-        self.coin_value = 0
-        self.draw_reward()
-        
-    def draw_reward(self):
-        """Draw reward and assign values"""
-        if self.type == "star":
-            self.points = 10
-            self.coin_value = 1
-            pygame.draw.circle(self.image, YELLOW, (REWARD_SIZE // 2, REWARD_SIZE // 2), REWARD_SIZE // 2)
-        elif self.type == "planet":
-            self.points = 50
-            self.coin_value = 5
-            planet_color = random.choice([BLUE, GREEN, ORANGE, PURPLE])
-            pygame.draw.circle(self.image, planet_color, (REWARD_SIZE // 2, REWARD_SIZE // 2), REWARD_SIZE // 2)
-        elif self.type == "treasure":
-            self.points = 100
-            self.coin_value = 10
-            pygame.draw.rect(self.image, YELLOW, (0, 0, REWARD_SIZE, REWARD_SIZE), border_radius=5)
+def build_obstacle_frames():
+    """Pre-render every rotation frame for all obstacle types"""
+    for kind in OBSTACLE_DEFS:
+        for angle in range(0, 360, OBSTACLE_ROTATION_STEP):
+            get_obstacle_frame(kind, angle)
+
+# --- Scrolling Entity Store ---
+# Categories of the entities that scroll past the player; each indexes STORE_KINDS
+OBSTACLE, REWARD, POWERUP = 0, 1, 2
+STORE_KINDS = [OBSTACLE_DEFS, REWARD_DEFS, POWERUP_DEFS]
+STORE_CAPACITY = 256  # initial slots; the arrays double when full
+MAGNET_RADIUS = 200
+MAGNET_PULL = 3  # pixels per tick a magnetised reward moves toward the player
+
+def entity_image(category, kind, tint, rotation):
+    """The shared image a store entity draws with"""
+    entity_type = STORE_KINDS[category][kind]
+    if category == OBSTACLE:
+        return get_obstacle_frame(entity_type, rotation)
+    return entity_type.images[tint]
+
+def entity_mask(category, kind, tint, rotation):
+    """The precomputed mask matching entity_image"""
+    entity_type = STORE_KINDS[category][kind]
+    if category == OBSTACLE:
+        get_obstacle_frame(entity_type, rotation)
+        return entity_type.frame_masks[rotation % 360 // OBSTACLE_ROTATION_STEP]
+    return entity_type.masks[tint]
+
+class EntityStore:
+    """Obstacles, rewards and power-ups as parallel NumPy arrays, one slot per entity"""
+    # Live entities fill slots [0, size) in spawn order; x and y are centers
+    FIELDS = {
+        'x': np.float64, 'y': np.float64, 'vx': np.float64, 'vy': np.float64,
+        'previous_x': np.float64, 'previous_y': np.float64, 'half': np.float64,
+        'category': np.int8, 'kind': np.int16, 'tint': np.int16, 'rotation': np.int16, 'alive': np.bool_,
+    }
+    
+    def __init__(self, capacity=STORE_CAPACITY):
+        self.size = 0
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype))
             
-    def update(self, scroll_speed, player=None):
-        """Update reward position with magnet effect"""
-        if player and player.magnet_active:
-            dx = player.rect.centerx - self.rect.centerx
-            dy = player.rect.centery - self.rect.centery
-            dist = math.sqrt(dx**2 + dy**2)
-            if dist < 200 and dist > 0:
-                self.rect.x += dx / dist * 3
-                self.rect.y += dy / dist * 3
-        
-        self.rect.x += -scroll_speed
-        if self.rect.right < 0:
-            self.kill()
+    def __len__(self):
+        return self.size
+    
+    def count(self, category):
+        return int(np.count_nonzero(self.category[:self.size] == category))
+    
+    def spawn(self, category, kind, x, y, tint=0):
+        """Add an entity of an EntityType centred on (x, y) and return its slot"""
+        if self.size == len(self.x):
+            for name in self.FIELDS:
+                array = getattr(self, name)
+                setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+        slot = self.size
+        self.size += 1
+        # A new entity must not interpolate from whatever last used the slot
+        self.x[slot] = self.previous_x[slot] = x
+        self.y[slot] = self.previous_y[slot] = y
+        self.vx[slot] = self.vy[slot] = 0
+        self.category[slot] = category
+        self.kind[slot] = kind.index
+        self.tint[slot] = tint
+        self.rotation[slot] = 0
+        # Obstacles rotate, so their half-extent covers every rotation frame
+        self.half[slot] = math.ceil(kind.size * math.sqrt(2) / 2) + 1 if category == OBSTACLE else kind.size / 2
+        self.alive[slot] = True
+        return slot
+    
+    def update(self, scroll_speed, magnet_target=None):
+        """Scroll everything, pull rewards toward magnet_target and cull what left the screen"""
+        n = self.size
+        x, y, vx, vy = self.x[:n], self.y[:n], self.vx[:n], self.vy[:n]
+        self.previous_x[:n] = x
+        self.previous_y[:n] = y
+        vx[:] = -scroll_speed
+        vy[:] = 0
+        if magnet_target is not None:
+            dx = magnet_target[0] - x
+            dy = magnet_target[1] - y
+            dist = np.hypot(dx, dy)
+            pulled = (self.category[:n] == REWARD) & (dist < MAGNET_RADIUS) & (dist > 0)
+            scale = MAGNET_PULL / dist[pulled]
+            vx[pulled] += dx[pulled] * scale
+            vy[pulled] += dy[pulled] * scale
+        x += vx
+        y += vy
+        rotation = self.rotation[:n]
+        rotation += OBSTACLE_ROTATION_STEP
+        rotation %= 360
+        self.alive[:n] &= x + self.half[:n] >= 0
+        self.sweep()
+        
+    def kill(self, slots):
+        """Remove the entities in slots; later slots shift down to stay contiguous"""
+        self.alive[slots] = False
+        self.sweep()
+        
+    def sweep(self):
+        """Compact the live entities to the front of the arrays, in order"""
+        n = self.size
+        if self.alive[:n].all():
+            return
+        keep = np.flatnonzero(self.alive[:n])
+        for name in self.FIELDS:
+            array = getattr(self, name)
+            array[:len(keep)] = array[keep]
+        self.size = len(keep)
+        
+    def image(self, slot):
+        return entity_image(int(self.category[slot]), int(self.kind[slot]), int(self.tint[slot]), int(self.rotation[slot]))
+    
+    def mask(self, slot):
+        return entity_mask(int(self.category[slot]), int(self.kind[slot]), int(self.tint[slot]), int(self.rotation[slot]))
+    
+    def center(self, slot):
+        return int(self.x[slot]), int(self.y[slot])
+    
+    def rect(self, slot):
+        """The pygame rect the entity occupies this tick"""
+        return self.image(slot).get_rect(center=self.center(slot))
+    
+    def rects(self, category):
+        """Rects of every live entity in a category"""
+        return [self.rect(slot) for slot in np.flatnonzero(self.category[:self.size] == category)]
+    
+    def collide(self, category, sprite, precise=False):
+        """Slots of a category touching sprite, by rect or, when precise, by mask"""
+        n = self.size
+        rect = sprite.rect
+        half = self.half[:n]
+        # Broad phase over every entity at once; only the survivors get a rect
+        near = ((self.category[:n] == category)
+                & (np.abs(self.x[:n] - (rect.x + rect.width / 2)) < half + rect.width / 2)
+                & (np.abs(self.y[:n] - (rect.y + rect.height / 2)) < half + rect.height / 2))
+        hits = []
+        for slot in np.flatnonzero(near).tolist():
+            hit = self.rect(slot)
+            if not rect.colliderect(hit):
+                continue
+            if precise and not sprite.mask.overlap(self.mask(slot), (hit.x - rect.x, hit.y - rect.y)):
+                continue
+            hits.append(slot)
+        return hits
+    
+    def draw(self, surface, alpha=1):
+        """Blit every entity at its position interpolated between the last two ticks"""
+        n = self.size
+        if n == 0:
+            return
+        x, y = self.x[:n], self.y[:n]
+        if alpha < 1:
+            x = self.previous_x[:n] + (x - self.previous_x[:n]) * alpha
+            y = self.previous_y[:n] + (y - self.previous_y[:n]) * alpha
+        blits = []
+        for category, kind, tint, rotation, cx, cy in zip(
+                self.category[:n].tolist(), self.kind[:n].tolist(), self.tint[:n].tolist(),
+                self.rotation[:n].tolist(), x.astype(int).tolist(), y.astype(int).tolist()):
+            image = entity_image(category, kind, tint, rotation)
+            blits.append((image, (cx - image.get_width() // 2, cy - image.get_height() // 2)))
+        surface.blits(blits, False)
+        
+    def dirty_rects(self):
+        """One rect per entity covering where it was drawn last tick and where it is now"""
+        n = self.size
+        half = self.half[:n] + 1
+        left = np.floor(np.minimum(self.x[:n], self.previous_x[:n]) - half).astype(int)
+        top = np.floor(np.minimum(self.y[:n], self.previous_y[:n]) - half).astype(int)
+        right = np.ceil(np.maximum(self.x[:n], self.previous_x[:n]) + half).astype(int)
+        bottom = np.ceil(np.maximum(self.y[:n], self.previous_y[:n]) + half).astype(int)
+        return [pygame.Rect(l, t, r - l, b - t)
+                for l, t, r, b in zip(left.tolist(), top.tolist(), right.tolist(), bottom.tolist())]
 
 # --- Background System ---
+STAR_COUNT = 200
+NEBULA_COUNT = 50
+
+# Per-theme look: fill colour, star scroll factor, star colours and how many
+# of the stars are shown. Twinkling themes pick a new colour per star each frame.
+BACKGROUND_THEMES = {
+    "space": {'fill': BLACK, 'star_speed': 0.5, 'colors': [WHITE], 'star_fraction': 1, 'twinkle': False, 'respawn_y': True},
+    "nebula": {'fill': (10, 0, 20), 'star_speed': 0.5, 'colors': [WHITE], 'star_fraction': 0.5, 'twinkle': False, 'respawn_y': False},
+    "asteroid_field": {'fill': (20, 10, 0), 'star_speed': 0.6, 'colors': [WHITE, GRAY, ORANGE], 'star_fraction': 1, 'twinkle': True, 'respawn_y': False},
+    "deep_space": {'fill': (5, 0, 15), 'star_speed': 0.4, 'colors': [(b, b, 255) for b in range(100, 256, 15)], 'star_fraction': 1, 'twinkle': True, 'respawn_y': False},
+}
+STAR_SIZES = (1, 2, 3)
+NEBULA_MARGIN = 50
+NEBULA_LAYER_WIDTH = SCREEN_WIDTH + NEBULA_MARGIN * 2
+
+# Translucent nebula blobs shared by every nebula layer, keyed by (radius, color)
+nebula_blobs = {}
+
+def get_nebula_blob(radius, color):
+    """Return the shared nebula blob image, drawing it on first use"""
+    key = (radius, color)
+    blob = nebula_blobs.get(key)
+    if blob is None:
+        blob = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+        pygame.draw.circle(blob, (*color[:3], 30), (radius, radius), radius)
+        nebula_blobs[key] = blob
+    return blob
+
+def draw_star_image(size, color):
+    """Draw a single star of the given radius"""
+    image = pygame.Surface((size * 2, size * 2), pygame.SRCALPHA)
+    pygame.draw.circle(image, color, (size, size), size)
+    return image
+
 class BackgroundManager:
     """Manages different background themes for levels"""
-    def __init__(self):
+    def __init__(self, star_count=STAR_COUNT):
         self.current_theme = "space"
-        self.stars = []
+        self.star_count = star_count
+        # Star images for every theme are drawn up front so theme changes are free;
+        # star_images[theme][(size - 1) * len(colors) + color_id]
+        self.star_images = {}
+        for theme_name, theme in BACKGROUND_THEMES.items():
+            self.star_images[theme_name] = [draw_star_image(size, color) for size in STAR_SIZES for color in theme['colors']]
         self.nebula_particles = []
+        self.nebula_layer = None
+        self.nebula_offset = 0
         self.reset_background()
         
     def reset_background(self):
         """Reset background elements"""
-        self.stars = []
-        for _ in range(200):
-            self.stars.append([random.randint(0, SCREEN_WIDTH), 
-                             random.randint(0, SCREEN_HEIGHT), 
-                             random.randint(1, 3)])
+        self.star_x = np.random.randint(0, SCREEN_WIDTH + 1, self.star_count).astype(np.float32)
+        self.star_y = np.random.randint(0, SCREEN_HEIGHT + 1, self.star_count).astype(np.float32)
+        self.star_size = np.random.randint(STAR_SIZES[0], STAR_SIZES[-1] + 1, self.star_count)
         
         self.nebula_particles = []
-        for _ in range(50):
+        for _ in range(NEBULA_COUNT):
             self.nebula_particles.append([random.randint(0, SCREEN_WIDTH),
                                         random.randint(0, SCREEN_HEIGHT),
                                         random.randint(10, 30),
                                         random.choice([PURPLE, BLUE, PINK, CYAN])])
+        self.build_nebula_layer()
+        
+    def build_nebula_layer(self):
+        """Composite all nebula blobs into one seamlessly wrapping texture"""
+        self.nebula_layer = pygame.Surface((NEBULA_LAYER_WIDTH, SCREEN_HEIGHT + 60), pygame.SRCALPHA)
+        self.nebula_offset = 0
+        for x, y, radius, color in self.nebula_particles:
+            blob = get_nebula_blob(radius, color)
+            layer_x = x + NEBULA_MARGIN
+            self.nebula_layer.blit(blob, (layer_x, y))
+            if layer_x + radius * 2 > NEBULA_LAYER_WIDTH:
+                self.nebula_layer.blit(blob, (layer_x - NEBULA_LAYER_WIDTH, y))
     
     def change_theme(self, level):
         """Change background based on level"""
@@ -512,62 +1340,76 @@ class BackgroundManager:
     
     def draw(self, surface, scroll_speed):
         """Draw background based on theme"""
-        if self.current_theme == "space":
-            surface.fill(BLACK)
-            for star in self.stars:
-                pygame.draw.circle(surface, WHITE, (int(star[0]), int(star[1])), star[2])
-                star[0] -= scroll_speed * 0.5
-                if star[0] < 0:
-                    star[0] = SCREEN_WIDTH
-                    star[1] = random.randint(0, SCREEN_HEIGHT)
-                    
-        elif self.current_theme == "nebula":
-            surface.fill((10, 0, 20))
-            for nebula in self.nebula_particles:
-                s = pygame.Surface((nebula[2] * 2, nebula[2] * 2), pygame.SRCALPHA)
-                pygame.draw.circle(s, (*nebula[3][:3], 30), (nebula[2], nebula[2]), nebula[2])
-                surface.blit(s, (int(nebula[0]), int(nebula[1])))
-                nebula[0] -= scroll_speed * 0.3
-                if nebula[0] < -50:
-                    nebula[0] = SCREEN_WIDTH + 50
-            for star in self.stars[:100]:
-                pygame.draw.circle(surface, WHITE, (int(star[0]), int(star[1])), star[2])
-                star[0] -= scroll_speed * 0.5
-                if star[0] < 0:
-                    star[0] = SCREEN_WIDTH
-                    
-        elif self.current_theme == "asteroid_field":
-            surface.fill((20, 10, 0))
-            for star in self.stars:
-                color = random.choice([WHITE, GRAY, ORANGE])
-                pygame.draw.circle(surface, color, (int(star[0]), int(star[1])), star[2])
-                star[0] -= scroll_speed * 0.6
-                if star[0] < 0:
-                    star[0] = SCREEN_WIDTH
-                    
-        else:  # deep_space
-            surface.fill((5, 0, 15))
-            for star in self.stars:
-                brightness = random.randint(100, 255)
-                color = (brightness, brightness, 255)
-                pygame.draw.circle(surface, color, (int(star[0]), int(star[1])), star[2])
-                star[0] -= scroll_speed * 0.4
-                if star[0] < 0:
-                    star[0] = SCREEN_WIDTH
+        theme = BACKGROUND_THEMES[self.current_theme]
+        surface.fill(theme['fill'])
+        if self.current_theme == "nebula":
+            self.draw_nebula(surface, scroll_speed)
+        self.draw_stars(surface, scroll_speed, theme)
+        
+    def draw_nebula(self, surface, scroll_speed):
+        """Draw and scroll the translucent nebula clouds"""
+        x = -NEBULA_MARGIN - int(self.nebula_offset)
+        surface.blit(self.nebula_layer, (x, 0))
+        surface.blit(self.nebula_layer, (x + NEBULA_LAYER_WIDTH, 0))
+        self.nebula_offset = (self.nebula_offset + scroll_speed * 0.3) % NEBULA_LAYER_WIDTH
+                
+    def draw_stars(self, surface, scroll_speed, theme):
+        """Blit every visible star, then scroll them all in one step"""
+        count = int(self.star_count * theme['star_fraction'])
+        star_x = self.star_x[:count]
+        star_y = self.star_y[:count]
+        sizes = self.star_size[:count]
+        
+        n_colors = len(theme['colors'])
+        image_ids = (sizes - 1) * n_colors
+        if theme['twinkle']:
+            image_ids += np.random.randint(0, n_colors, count)
+        images = self.star_images[self.current_theme]
+        xs = (star_x.astype(np.int32) - sizes).tolist()
+        ys = (star_y.astype(np.int32) - sizes).tolist()
+        surface.blits(list(zip(map(images.__getitem__, image_ids.tolist()), zip(xs, ys))), False)
+        
+        star_x -= scroll_speed * theme['star_speed']
+        wrapped = star_x < 0
+        star_x[wrapped] = SCREEN_WIDTH
+        if theme['respawn_y']:
+            star_y[wrapped] = np.random.randint(0, SCREEN_HEIGHT + 1, np.count_nonzero(wrapped))
 
 # --- Utility Functions ---
-def draw_text(text, font, color, x, y):
-    """Render text to screen"""
-    text_surface = font.render(text, True, color)
+TEXT_CACHE_SIZE = 512
+
+# Rendered text surfaces keyed by (font, text, color), least recently used first
+text_cache = OrderedDict()
+
+def render_text(text, font, color):
+    """Return a rendered text surface, reusing a cached one when possible"""
+    key = (font, text, color)
+    text_surface = text_cache.get(key)
+    if text_surface is None:
+        text_surface = font.render(text, True, color)
+        text_cache[key] = text_surface
+        if len(text_cache) > TEXT_CACHE_SIZE:
+            text_cache.popitem(last=False)
+    else:
+        text_cache.move_to_end(key)
+    return text_surface
+
+def draw_text(text, font, color, x, y, surface=None):
+    """Render text to screen (or another surface)"""
+    text_surface = render_text(text, font, color)
     text_rect = text_surface.get_rect()
     text_rect.midtop = (x, y)
-    screen.blit(text_surface, text_rect)
+    (surface or get_screen()).blit(text_surface, text_rect)
 
-def create_particles(x, y, color, group):
-    """Create particle explosion effect"""
-    for _ in range(10):
-        particle = Particle(x, y, color)
-        group.add(particle)
+def draw_counter(label, value, font, color, x, y, surface=None):
+    """Draw a label and a number to screen (or another surface) from cached label and digit surfaces"""
+    parts = [render_text(label, font, color)]
+    parts.extend(render_text(digit, font, color) for digit in str(value))
+    x -= sum(part.get_width() for part in parts) // 2
+    surface = surface or get_screen()
+    for part in parts:
+        surface.blit(part, (x, y))
+        x += part.get_width()
 
 # --- Achievement Notification ---
 class AchievementNotification:
@@ -576,6 +1418,7 @@ class AchievementNotification:
         self.active = False
         self.achievement_id = None
         self.timer = 0
+        self.box = None
         
     def show(self, achievement_id):
         """Display achievement"""
@@ -602,49 +1445,100 @@ class AchievementNotification:
             box_x = SCREEN_WIDTH // 2 - box_width // 2
             box_y = y - 10
             
-            s = pygame.Surface((box_width, box_height), pygame.SRCALPHA)
-            pygame.draw.rect(s, (*GOLD, 200), (0, 0, box_width, box_height), border_radius=10)
-            pygame.draw.rect(s, GOLD, (0, 0, box_width, box_height), 3, border_radius=10)
-            surface.blit(s, (box_x, box_y))
+            if self.box is None:
+                self.box = pygame.Surface((box_width, box_height), pygame.SRCALPHA)
+                pygame.draw.rect(self.box, (*GOLD, 200), (0, 0, box_width, box_height), border_radius=10)
+                pygame.draw.rect(self.box, GOLD, (0, 0, box_width, box_height), 3, border_radius=10)
+            surface.blit(self.box, (box_x, box_y))
             
-            draw_text("ACHIEVEMENT UNLOCKED!", tiny_font, WHITE, SCREEN_WIDTH // 2, y)
-            draw_text(f"{achievement['icon']} {achievement['name']}", small_font, GOLD, SCREEN_WIDTH // 2, y + 30)
+            draw_text("ACHIEVEMENT UNLOCKED!", get_font('tiny'), WHITE, SCREEN_WIDTH // 2, y, surface)
+            draw_text(f"{achievement['icon']} {achievement['name']}", get_font('small'), GOLD, SCREEN_WIDTH // 2, y + 30, surface)
 
 # --- Menu and UI Functions ---
+MENU_FPS = 30
+MENU_IDLE_SECONDS = 30  # the menu stops animating after this long without input
+MENU_STAR_COUNT = 100
+MENU_STAR_SPEED = 0.5
+
+menu_starfield = None
+
+def get_menu_starfield():
+    """The menu's star field, drawn once; it scrolls as a whole"""
+    global menu_starfield
+    if menu_starfield is None:
+        menu_starfield = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        menu_starfield.fill(BLACK)
+        for _ in range(MENU_STAR_COUNT):
+            pygame.draw.circle(menu_starfield, WHITE, (random.randint(0, SCREEN_WIDTH), random.randint(0, SCREEN_HEIGHT)), random.randint(1, 2))
+    return menu_starfield
+
+def wait_for_event():
+    """Sleep until the next event, re-presenting the last frame if the window needs it"""
+    while True:
+        event = pygame.event.wait()
+        if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+            pygame.display.flip()
+        else:
+            return event
+
+def build_menu_layer(options, selected_option, top_runs):
+    """Everything on the main menu except the stars"""
+    layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+    draw_text("ENHANCED SPACE RUNNER", get_font('large'), CYAN, SCREEN_WIDTH // 2, 80, layer)
+    draw_text(f"High Score: {high_score}", get_font('small'), YELLOW, SCREEN_WIDTH // 2, 150, layer)
+    draw_text(f"Coins: {coins}", get_font('small'), GOLD, SCREEN_WIDTH // 2, 190, layer)
+    
+    for i, option in enumerate(options):
+        color = YELLOW if i == selected_option else WHITE
+        draw_text(option, get_font('small'), color, SCREEN_WIDTH // 2, 280 + i * 60, layer)
+    
+    if top_runs:
+        draw_text("Top Runs: " + "   ".join(str(run['score']) for run in top_runs), get_font('tiny'), GRAY, SCREEN_WIDTH // 2, 540, layer)
+    return layer
+
 def show_main_menu():
     """Display main menu"""
-    load_game_data()
-    menu_running = True
+    screen = get_screen()
+    clock = get_clock()
+    refresh_profile()
     selected_option = 0
     options = ["PLAY", "SKINS", "ACHIEVEMENTS", "QUIT"]
+    top_runs = get_run_history().top_runs(3)
+    starfield = get_menu_starfield()
+    layer = build_menu_layer(options, selected_option, top_runs)
+    star_offset = 0
+    last_input = time.monotonic()
     
-    bg_stars = []
-    for _ in range(100):
-        bg_stars.append([random.randint(0, SCREEN_WIDTH), random.randint(0, SCREEN_HEIGHT), random.randint(1, 2)])
-    
-    while menu_running:
-        screen.fill(BLACK)
-        
-        for star in bg_stars:
-            pygame.draw.circle(screen, WHITE, (int(star[0]), int(star[1])), star[2])
-            star[0] -= 0.5
-            if star[0] < 0:
-                star[0] = SCREEN_WIDTH
-        
-        draw_text("ENHANCED SPACE RUNNER", font, CYAN, SCREEN_WIDTH // 2, 80)
-        draw_text(f"High Score: {high_score}", small_font, YELLOW, SCREEN_WIDTH // 2, 150)
-        draw_text(f"Coins: {coins}", small_font, GOLD, SCREEN_WIDTH // 2, 190)
+    while True:
+        animating = time.monotonic() - last_input < MENU_IDLE_SECONDS
+        # Redraw for animation ticks and after input; an idle menu just waits
+        x = -int(star_offset)
+        screen.blit(starfield, (x, 0))
+        screen.blit(starfield, (x + SCREEN_WIDTH, 0))
+        screen.blit(layer, (0, 0))
+        pygame.display.flip()
         
-        for i, option in enumerate(options):
-            color = YELLOW if i == selected_option else WHITE
-            draw_text(option, small_font, color, SCREEN_WIDTH // 2, 280 + i * 60)
+        if not startup_profiler.marks:
+            # The menu is up; load sounds now rather than before the first frame
+            startup_profiler.mark('first frame')
+            get_sound_manager()
+            startup_profiler.mark('sounds ready')
+            if startup_profiler.exit_after_first_frame:
+                return "quit"
         
-        pygame.display.flip()
+        if animating:
+            events = pygame.event.get()
+            clock.tick(MENU_FPS)
+            star_offset = (star_offset + MENU_STAR_SPEED) % SCREEN_WIDTH
+        else:
+            events = [wait_for_event()]
+            clock.tick()
         
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 return "quit"
             if event.type == pygame.KEYDOWN:
+                last_input = time.monotonic()
                 if event.key == pygame.K_UP:
                     selected_option = (selected_option - 1) % len(options)
                 elif event.key == pygame.K_DOWN:
@@ -658,119 +1552,110 @@ def show_main_menu():
                         return "achievements"
                     elif selected_option == 3:
                         return "quit"
-        
-        clock.tick(30)
+                layer = build_menu_layer(options, selected_option, top_runs)
 
 def show_achievements_screen():
     """Display achievements"""
-    running = True
-    
-    while running:
-        screen.fill(BLACK)
-        draw_text("ACHIEVEMENTS", font, CYAN, SCREEN_WIDTH // 2, 30)
+    screen = get_screen()
+    screen.fill(BLACK)
+    draw_text("ACHIEVEMENTS", get_font('large'), CYAN, SCREEN_WIDTH // 2, 30)
         
-        y_offset = 100
-        col = 0
-        for achievement_id, achievement in ACHIEVEMENTS.items():
-            unlocked = achievement_id in achievements_unlocked
-            color = GOLD if unlocked else GRAY
-            
-            x_pos = 200 if col == 0 else 600
-            
-            draw_text(achievement['icon'], small_font, color, x_pos, y_offset)
-            draw_text(achievement['name'], tiny_font, color, x_pos, y_offset + 35)
-            
-            if unlocked:
-                draw_text("✓", tiny_font, GREEN, x_pos, y_offset + 60)
-            else:
-                draw_text(f"{achievement['requirement']}", tiny_font, GRAY, x_pos, y_offset + 60)
-            
-            col += 1
-            if col >= 2:
-                col = 0
-                y_offset += 100
+    y_offset = 100
+    col = 0
+    for achievement_id, achievement in ACHIEVEMENTS.items():
+        unlocked = achievement_id in achievements_unlocked
+        color = GOLD if unlocked else GRAY
         
-        draw_text("Press ESC to return", tiny_font, WHITE, SCREEN_WIDTH // 2, 550)
-        pygame.display.flip()
+        x_pos = 200 if col == 0 else 600
         
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    return
+        draw_text(achievement['icon'], get_font('small'), color, x_pos, y_offset)
+        draw_text(achievement['name'], get_font('tiny'), color, x_pos, y_offset + 35)
+        
+        if unlocked:
+            draw_text("✓", get_font('tiny'), GREEN, x_pos, y_offset + 60)
+        else:
+            draw_text(f"{achievement['requirement']}", get_font('tiny'), GRAY, x_pos, y_offset + 60)
         
-        clock.tick(30)
+        col += 1
+        if col >= 2:
+            col = 0
+            y_offset += 100
+    
+    draw_text("Press ESC to return", get_font('tiny'), WHITE, SCREEN_WIDTH // 2, 550)
+    pygame.display.flip()
+    
+    # Nothing here changes until the player leaves
+    while True:
+        event = wait_for_event()
+        if event.type == pygame.QUIT:
+            return
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                return
 
 def show_skin_shop():
     """Display skin selection/shop"""
     global current_skin, coins, unlocked_skins
+    screen = get_screen()
     
-    skins = {
-        "default": {"name": "Classic", "cost": 0, "unlocked": True},
-        "golden": {"name": "Golden", "cost": 100, "unlocked": "golden" in unlocked_skins},
-        "robot": {"name": "Robot", "cost": 200, "unlocked": "robot" in unlocked_skins},
-        "alien": {"name": "Alien", "cost": 150, "unlocked": "alien" in unlocked_skins}
-    }
+    skins = {skin: {**info, "unlocked": info["cost"] == 0 or skin in unlocked_skins} for skin, info in SKINS.items()}
     
     skin_list = list(skins.keys())
     selected_index = 0
     shop_running = True
     
     while shop_running:
+        # Redrawn only after input
         screen.fill(BLACK)
-        draw_text("SKIN SHOP", font, CYAN, SCREEN_WIDTH // 2, 50)
-        draw_text(f"Coins: {coins}", small_font, GOLD, SCREEN_WIDTH // 2, 110)
+        draw_text("SKIN SHOP", get_font('large'), CYAN, SCREEN_WIDTH // 2, 50)
+        draw_text(f"Coins: {coins}", get_font('small'), GOLD, SCREEN_WIDTH // 2, 110)
         
         selected_skin = skin_list[selected_index]
         skin_info = skins[selected_skin]
         
-        preview_player = Player(selected_skin)
-        preview_rect = preview_player.image.get_rect(center=(SCREEN_WIDTH // 2, 250))
-        screen.blit(preview_player.image, preview_rect)
+        preview = get_skin_image(selected_skin, SKIN_PREVIEW_SCALE)
+        screen.blit(preview, preview.get_rect(center=(SCREEN_WIDTH // 2, 240)))
         
-        draw_text(skin_info["name"], small_font, WHITE, SCREEN_WIDTH // 2, 320)
+        draw_text(skin_info["name"], get_font('small'), WHITE, SCREEN_WIDTH // 2, 320)
         
         if skin_info["unlocked"]:
             if current_skin == selected_skin:
-                draw_text("EQUIPPED", small_font, GREEN, SCREEN_WIDTH // 2, 370)
+                draw_text("EQUIPPED", get_font('small'), GREEN, SCREEN_WIDTH // 2, 370)
             else:
-                draw_text("Press ENTER to Equip", tiny_font, YELLOW, SCREEN_WIDTH // 2, 370)
+                draw_text("Press ENTER to Equip", get_font('tiny'), YELLOW, SCREEN_WIDTH // 2, 370)
         else:
-            draw_text(f"Cost: {skin_info['cost']} coins", small_font, YELLOW, SCREEN_WIDTH // 2, 370)
+            draw_text(f"Cost: {skin_info['cost']} coins", get_font('small'), YELLOW, SCREEN_WIDTH // 2, 370)
             if coins >= skin_info['cost']:
-                draw_text("Press ENTER to Buy", tiny_font, GREEN, SCREEN_WIDTH // 2, 410)
+                draw_text("Press ENTER to Buy", get_font('tiny'), GREEN, SCREEN_WIDTH // 2, 410)
             else:
-                draw_text("Not enough coins", tiny_font, RED, SCREEN_WIDTH // 2, 410)
+                draw_text("Not enough coins", get_font('tiny'), RED, SCREEN_WIDTH // 2, 410)
         
-        draw_text("Use ARROW KEYS | ESC to return", tiny_font, GRAY, SCREEN_WIDTH // 2, 520)
+        draw_text("Use ARROW KEYS | ESC to return", get_font('tiny'), GRAY, SCREEN_WIDTH // 2, 520)
         pygame.display.flip()
         
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+        event = wait_for_event()
+        if event.type == pygame.QUIT:
+            return
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                save_game_data()
                 return
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
+            elif event.key == pygame.K_LEFT:
+                selected_index = (selected_index - 1) % len(skin_list)
+            elif event.key == pygame.K_RIGHT:
+                selected_index = (selected_index + 1) % len(skin_list)
+            elif event.key == pygame.K_RETURN:
+                if skin_info["unlocked"]:
+                    current_skin = selected_skin
                     save_game_data()
-                    return
-                elif event.key == pygame.K_LEFT:
-                    selected_index = (selected_index - 1) % len(skin_list)
-                elif event.key == pygame.K_RIGHT:
-                    selected_index = (selected_index + 1) % len(skin_list)
-                elif event.key == pygame.K_RETURN:
-                    if skin_info["unlocked"]:
-                        current_skin = selected_skin
-                        save_game_data()
-                    elif coins >= skin_info['cost']:
-                        coins -= skin_info['cost']
-                        unlocked_skins.append(selected_skin)
-                        skins[selected_skin]["unlocked"] = True
-                        current_skin = selected_skin
-                        save_game_data()
-        
-        clock.tick(30)
-
-def show_game_over_screen(score, coins_earned, level, new_achievements):
+                elif coins >= skin_info['cost']:
+                    coins -= skin_info['cost']
+                    unlocked_skins.append(selected_skin)
+                    skins[selected_skin]["unlocked"] = True
+                    current_skin = selected_skin
+                    save_game_data()
+
+def show_game_over_screen(score, coins_earned, level, new_achievements, run=None):
     """Display enhanced game over screen"""
     global high_score, coins
     
@@ -783,274 +1668,1053 @@ def show_game_over_screen(score, coins_earned, level, new_achievements):
     coins += coins_earned
     save_game_data()
     
+    screen = get_screen()
     screen.fill(BLACK)
     
     y_pos = 120
     if new_record:
-        draw_text("NEW RECORD!", font, GOLD, SCREEN_WIDTH // 2, y_pos)
+        draw_text("NEW RECORD!", get_font('large'), GOLD, SCREEN_WIDTH // 2, y_pos)
         y_pos += 60
     
-    draw_text("GAME OVER", font, WHITE, SCREEN_WIDTH // 2, y_pos)
+    draw_text("GAME OVER", get_font('large'), WHITE, SCREEN_WIDTH // 2, y_pos)
     y_pos += 70
     
-    draw_text(f"Score: {score}", small_font, WHITE, SCREEN_WIDTH // 2, y_pos)
+    draw_text(f"Score: {score}", get_font('small'), WHITE, SCREEN_WIDTH // 2, y_pos)
     y_pos += 40
-    draw_text(f"Level Reached: {level}", small_font, CYAN, SCREEN_WIDTH // 2, y_pos)
+    draw_text(f"Level Reached: {level}", get_font('small'), CYAN, SCREEN_WIDTH // 2, y_pos)
     y_pos += 40
-    draw_text(f"Coins Earned: +{coins_earned}", small_font, GOLD, SCREEN_WIDTH // 2, y_pos)
+    draw_text(f"Coins Earned: +{coins_earned}", get_font('small'), GOLD, SCREEN_WIDTH // 2, y_pos)
     y_pos += 40
     
     if new_achievements:
-        draw_text(f"{len(new_achievements)} New Achievement(s)!", tiny_font, YELLOW, SCREEN_WIDTH // 2, y_pos)
+        draw_text(f"{len(new_achievements)} New Achievement(s)!", get_font('tiny'), YELLOW, SCREEN_WIDTH // 2, y_pos)
         y_pos += 30
     
-    draw_text("Press 'R' to Restart | 'M' for Menu", small_font, WHITE, SCREEN_WIDTH // 2, 520)
+    if run is not None:
+        history = get_run_history()
+        leaderboard = history.top_runs(10)
+        rank = next((i for i, best in enumerate(leaderboard, 1) if best is run), None)
+        if rank:
+            draw_text(f"#{rank} on the leaderboard", get_font('tiny'), GOLD, SCREEN_WIDTH // 2, y_pos)
+            y_pos += 30
+        today_best = history.top_runs(1, day=run['day'])
+        skin_best = history.top_runs(1, skin=run['skin'])
+        if today_best and skin_best:
+            draw_text(f"Best Today: {today_best[0]['score']} | Best as {run['skin'].title()}: {skin_best[0]['score']}",
+                      get_font('tiny'), GRAY, SCREEN_WIDTH // 2, y_pos)
+            y_pos += 30
+    
+    draw_text("Press 'R' to Restart | 'M' for Menu", get_font('small'), WHITE, SCREEN_WIDTH // 2, 520)
     pygame.display.flip()
     
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return "quit"
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_r:
-                    return "restart"
-                if event.key == pygame.K_m:
-                    return "menu"
-        clock.tick(15)
+    while True:
+        event = wait_for_event()
+        if event.type == pygame.QUIT:
+            return "quit"
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_r:
+                return "restart"
+            if event.key == pygame.K_m:
+                return "menu"
 
-# --- Main Game Function ---
-def run_game():
-    """Main game loop with all enhancements"""
-    global coins, stats
-    
-    all_sprites = pygame.sprite.Group()
-    obstacles = pygame.sprite.Group()
-    rewards = pygame.sprite.Group()
-    powerups = pygame.sprite.Group()
-    particles = pygame.sprite.Group()
-    bosses = pygame.sprite.Group()
-    boss_projectiles = pygame.sprite.Group()
-    
-    player = Player(current_skin)
-    all_sprites.add(player)
-    
-    score = 0
-    coins_earned = 0
-    scroll_speed = INITIAL_SCROLL_SPEED
-    level = 1
-    
-    last_obstacle_spawn = pygame.time.get_ticks()
-    last_reward_spawn = pygame.time.get_ticks()
-    last_powerup_spawn = pygame.time.get_ticks()
-    
-    next_boss_score = BOSS_SPAWN_SCORE
-    boss_active = False
-    boss_types = ["alien", "asteroid", "mothership"]
-    current_boss_type = 0
+# --- Frame Profiler ---
+PROFILER_HISTORY = 240  # frames kept for the rolling statistics
+PROFILER_TRACE_EVENTS = 100000
+PROFILER_TRACE_PATH = 'frame_trace.json'
+PROFILER_OVERLAY_RECT = pygame.Rect(SCREEN_WIDTH - 290, 50, 280, 350)
+PROFILER_GRAPH_HEIGHT = 80
+PROFILER_GRAPH_MAX_MS = 1000 / 30
+TRACE_PATH = None  # set by --trace to export every session's trace
+
+def percentiles(samples):
+    """p50/p95/p99/mean/max of a list of numbers"""
+    values = np.asarray(samples, dtype=np.float64)
+    if values.size == 0:
+        values = np.zeros(1)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'p50': round(p50, 4), 'p95': round(p95, 4), 'p99': round(p99, 4),
+            'mean': round(values.mean(), 4), 'max': round(values.max(), 4)}
+
+def timed(profiler, phase, func, *args):
+    """Call func, timing it as phase when a profiler is given"""
+    if profiler is None:
+        return func(*args)
+    return profiler.time(phase, func, *args)
+
+class FrameProfiler:
+    """Rolling per-phase frame timings with an on-screen overlay and Chrome trace export"""
+    def __init__(self, history=PROFILER_HISTORY, tracing=False):
+        self.history = history
+        self.samples = {}
+        self.frame_times = deque(maxlen=history)
+        # (name, start, end) in perf_counter seconds, converted only on export;
+        # kept only while tracing so untraced sessions don't pile up tuples
+        self.tracing = tracing
+        self.trace = deque(maxlen=PROFILER_TRACE_EVENTS)
+        self.frame_start = 0
+        self.overlay_visible = False
+        self.overlay_panel = None
+        self.overlay_lines = []
+        
+    def time(self, phase, func, *args):
+        """Call func and record how long it took"""
+        start = time.perf_counter()
+        result = func(*args)
+        self.record(phase, start, time.perf_counter())
+        return result
+    
+    def record(self, phase, start, end):
+        """Record one timed phase"""
+        samples = self.samples.get(phase)
+        if samples is None:
+            samples = self.samples[phase] = deque(maxlen=self.history)
+        samples.append((end - start) * 1000)
+        if self.tracing:
+            self.trace.append((phase, start, end))
+        
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+        
+    def end_frame(self):
+        end = time.perf_counter()
+        self.frame_times.append((end - self.frame_start) * 1000)
+        if self.tracing:
+            self.trace.append(('frame', self.frame_start, end))
+        
+    def summary(self):
+        """Percentiles for each phase over the rolling window"""
+        return {phase: percentiles(samples) for phase, samples in self.samples.items()}
+    
+    def export_chrome_trace(self, path=PROFILER_TRACE_PATH):
+        """Write the recorded phases in Chrome's trace event format (chrome://tracing, Perfetto)"""
+        events = [{'name': name, 'cat': 'frame' if name == 'frame' else 'phase', 'ph': 'X',
+                   'ts': round(start * 1e6, 1), 'dur': round((end - start) * 1e6, 1), 'pid': 1, 'tid': 1}
+                  for name, start, end in self.trace]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+            
+    def draw_overlay(self, surface, state, particles):
+        """Draw the frame-time graph, phase timings and entity counts"""
+        rect = PROFILER_OVERLAY_RECT
+        if self.overlay_panel is None:
+            self.overlay_panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+            self.overlay_panel.fill((0, 0, 0, 180))
+        surface.blit(self.overlay_panel, rect)
+        
+        # Frame-time graph with a line at the 60 fps budget
+        graph_bottom = rect.top + 10 + PROFILER_GRAPH_HEIGHT
+        scale = PROFILER_GRAPH_HEIGHT / PROFILER_GRAPH_MAX_MS
+        budget_y = graph_bottom - int(1000 / 60 * scale)
+        pygame.draw.line(surface, GRAY, (rect.left + 10, budget_y), (rect.right - 10, budget_y))
+        if len(self.frame_times) > 1:
+            step_x = (rect.width - 20) / (self.history - 1)
+            points = [(rect.left + 10 + i * step_x, graph_bottom - min(ms, PROFILER_GRAPH_MAX_MS) * scale)
+                      for i, ms in enumerate(self.frame_times)]
+            pygame.draw.lines(surface, GREEN, False, points)
+        
+        # Percentiles are recomputed a few times a second, not every frame
+        if state.tick % 15 == 0 or not self.overlay_lines:
+            frame = percentiles(self.frame_times)
+            self.overlay_lines = ["ms             p50   p95", f"{'frame':12} {frame['p50']:5.2f} {frame['p95']:5.2f}"]
+            for phase, stat in self.summary().items():
+                self.overlay_lines.append(f"{phase[:12]:12} {stat['p50']:5.2f} {stat['p95']:5.2f}")
+            self.overlay_lines.append(f"obst {state.entities.count(OBSTACLE)} rew {state.entities.count(REWARD)} "
+                                      f"pow {state.entities.count(POWERUP)} "
+                                      f"proj {len(state.boss_projectiles)} fx {len(particles)}")
+        tiny = get_font('tiny')
+        y = graph_bottom + 8
+        for line in self.overlay_lines:
+            surface.blit(render_text(line, tiny, WHITE), (rect.left + 10, y))
+            y += 16
+
+# --- Simulation Core ---
+TICK_MS = 1000 / FPS
+
+class GameState:
+    """Everything one run needs to simulate, with no display or mixer"""
+    def __init__(self, skin="default", stats=None, achievements=None, seed=None):
+        # Every random choice the simulation makes comes from this run's own
+        # RNG, so the seed plus the per-tick input reproduces a run exactly
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.rng = random.Random(self.seed)
+        
+        # Obstacles, rewards and power-ups live in the entity store; the
+        # groups hold the player, bosses and their projectiles
+        self.entities = EntityStore()
+        self.all_sprites = pygame.sprite.Group()
+        self.bosses = pygame.sprite.Group()
+        self.boss_projectiles = pygame.sprite.Group()
+        
+        self.player = Player(skin)
+        self.all_sprites.add(self.player)
+        
+        # Killed projectiles, kept for reuse instead of allocating new ones
+        self.free_projectiles = []
+        
+        self.score = 0
+        self.coins_earned = 0
+        self.scroll_speed = INITIAL_SCROLL_SPEED
+        self.level = 1
+        
+        # Simulated clock, advanced by TICK_MS per step
+        self.tick = 0
+        self.time_ms = 0
+        self.last_obstacle_spawn = 0
+        self.last_reward_spawn = 0
+        self.last_powerup_spawn = 0
+        
+        self.next_boss_score = BOSS_SPAWN_SCORE
+        self.boss_active = False
+        self.current_boss_type = 0
+        
+        self.stats = stats if stats is not None else new_stats()
+        self.achievements = achievements if achievements is not None else []
+        self.game_powerups_collected = 0
+        self.game_treasures_collected = 0
+        self.game_bosses_defeated = 0
+        self.new_achievements = []
+        self.achievement_engine = AchievementEngine(self.achievements)
+        
+        self.move = 0
+        self.game_over = False
+        # When set, each step remembers sprite centers for render interpolation
+        self.track_motion = False
+        # Things the renderer should react to, refilled by every step:
+        # ('sound', name), ('particles', x, y, color), ('level', level), ('achievement', id)
+        self.events = []
+
+def step(state, move=0, profiler=None):
+    """Advance the simulation by one tick; move is -1 (up), 0 or 1 (down)"""
+    state.move = move
+    for phase, update in SIM_PHASES:
+        timed(profiler, phase, update, state)
+
+def update_player(state):
+    """Start a new tick: advance the clock, move the player and track the level"""
+    state.events = []
+    state.tick += 1
+    state.time_ms += TICK_MS
+    player = state.player
+    if state.track_motion:
+        for sprite in state.all_sprites:
+            sprite.previous_center = sprite.rect.center
+    
+    player.speedy = state.move * PLAYER_SPEED
+    player.update()
+    state.scroll_speed += SPEED_INCREASE_RATE * 0.01
+    if state.tick == 1:
+        # Lifetime counters may already meet requirements added since the last save
+        for counter in ('total_coins', 'bosses_defeated', 'powerups_collected'):
+            publish_counter(state, counter, state.stats[counter])
     
+    # Calculate level
+    new_level = (state.score // 300) + 1
+    if new_level > state.level:
+        state.level = new_level
+        state.events.append(('level', state.level))
+        state.events.append(('sound', 'levelup'))
+        if state.level > state.stats['max_speed_level']:
+            state.stats['max_speed_level'] = state.level
+        publish_counter(state, 'level', state.level)
+
+def update_entities(state):
+    """Move every entity for one tick"""
+    player = state.player
+    state.entities.update(state.scroll_speed, player.rect.center if player.magnet_active else None)
+    for boss in state.bosses:
+        boss.update()
+    for projectile in state.boss_projectiles:
+        projectile.update()
+        if not projectile.alive():
+            state.free_projectiles.append(projectile)
+
+def spawn_scroller(state, category, kind):
+    """Add an entity of kind just past the right edge at a random height and return its slot"""
+    rng = state.rng
+    x = SCREEN_WIDTH + rng.randint(50, 100) - kind.size / 2
+    y = rng.randint(0, SCREEN_HEIGHT - kind.size) + kind.size / 2
+    tint = rng.randrange(len(kind.images)) if len(kind.images) > 1 else 0
+    return state.entities.spawn(category, kind, x, y, tint)
+
+def spawn_entities(state):
+    """Spawn obstacles, rewards, power-ups, bosses and boss projectiles"""
+    now = state.time_ms
+    rng = state.rng
+    if not state.boss_active and now - state.last_obstacle_spawn > rng.randint(SPAWN_INTERVAL_MIN, SPAWN_INTERVAL_MAX):
+        state.last_obstacle_spawn = now
+        spawn_scroller(state, OBSTACLE, rng.choice(OBSTACLE_SPAWN_TABLE))
+    
+    if now - state.last_reward_spawn > rng.randint(80, 150):
+        state.last_reward_spawn = now
+        spawn_scroller(state, REWARD, rng.choice(REWARD_SPAWN_TABLE))
+    
+    if now - state.last_powerup_spawn > rng.randint(400, 600):
+        state.last_powerup_spawn = now
+        spawn_scroller(state, POWERUP, rng.choice(POWERUP_SPAWN_TABLE))
+    
+    if state.score >= state.next_boss_score and not state.boss_active:
+        boss = Boss(BOSS_DEFS[state.current_boss_type % len(BOSS_DEFS)])
+        state.all_sprites.add(boss)
+        state.bosses.add(boss)
+        state.boss_active = True
+        state.current_boss_type += 1
+        state.events.append(('sound', 'boss_appear'))
+    
+    for boss in state.bosses:
+        if boss.shoot_timer > 90:
+            boss.shoot_timer = 0
+            if state.free_projectiles:
+                projectile = state.free_projectiles.pop()
+                projectile.reset(boss.rect.left, boss.rect.centery)
+                # A recycled projectile must not interpolate from where it died
+                projectile.previous_center = None
+            else:
+                projectile = BossProjectile(boss.rect.left, boss.rect.centery)
+            state.all_sprites.add(projectile)
+            state.boss_projectiles.add(projectile)
+
+def resolve_collisions(state):
+    """Handle player collisions and the score, coins and power-ups they give"""
+    player = state.player
+    events = state.events
+    entities = state.entities
+    
+    # Hazards collide by pixel; pickups keep their forgiving rect test. Bosses
+    # and their projectiles are few enough to test one by one
+    if not player.shield_active and not player.invincible:
+        hits = entities.collide(OBSTACLE, player, precise=True)
+        if hits:
+            events.append(('sound', 'explosion'))
+            events.append(('particles', player.rect.centerx, player.rect.centery, RED))
+            state.game_over = True
+    
+    if not player.shield_active and not player.invincible:
+        proj_hits = pygame.sprite.spritecollide(player, state.boss_projectiles, True, pygame.sprite.collide_mask)
+        state.free_projectiles.extend(proj_hits)
+        if proj_hits:
+            events.append(('sound', 'explosion'))
+            events.append(('particles', player.rect.centerx, player.rect.centery, RED))
+            state.game_over = True
+    
+    reward_hits = entities.collide(REWARD, player)
+    for slot in reward_hits:
+        kind = REWARD_DEFS[entities.kind[slot]]
+        state.score += kind.points
+        state.coins_earned += kind.coins
+        state.stats['total_coins'] += kind.coins
+        events.append(('sound', 'coin'))
+        events.append(('particles', *entities.center(slot), YELLOW))
+        
+        if kind.treasure:
+            state.game_treasures_collected += 1
+            publish_counter(state, 'treasures', state.game_treasures_collected)
+        publish_counter(state, 'score', state.score)
+        if kind.coins:
+            publish_counter(state, 'total_coins', state.stats['total_coins'])
+    entities.kill(reward_hits)
+    
+    powerup_hits = entities.collide(POWERUP, player)
+    for slot in powerup_hits:
+        kind = POWERUP_DEFS[entities.kind[slot]]
+        kind.activate(player, kind.duration)
+        events.append(('sound', 'powerup'))
+        events.append(('particles', *entities.center(slot), PURPLE))
+        state.game_powerups_collected += 1
+        state.stats['powerups_collected'] += 1
+        publish_counter(state, 'powerups_collected', state.stats['powerups_collected'])
+    entities.kill(powerup_hits)
+    
+    if player.shield_active:
+        boss_hits = pygame.sprite.spritecollide(player, state.bosses, False, pygame.sprite.collide_mask)
+        for boss in boss_hits:
+            if boss.take_damage():
+                state.score += 500
+                state.coins_earned += 50
+                state.stats['bosses_defeated'] += 1
+                state.game_bosses_defeated += 1
+                events.append(('sound', 'explosion'))
+                events.append(('particles', boss.rect.centerx, boss.rect.centery, GOLD))
+                state.boss_active = False
+                state.next_boss_score = state.score + BOSS_SPAWN_SCORE
+                publish_counter(state, 'score', state.score)
+                publish_counter(state, 'bosses_defeated', state.stats['bosses_defeated'])
+
+def publish_counter(state, counter, value):
+    """Tell the achievement engine a counter changed and announce any unlocks"""
+    for achievement_id in state.achievement_engine.publish(counter, value):
+        state.new_achievements.append(achievement_id)
+        state.events.append(('achievement', achievement_id))
+        state.events.append(('sound', 'achievement'))
+
+# The parts of a tick in order, named for profiling
+SIM_PHASES = [
+    ('player', update_player),
+    ('entities', update_entities),
+    ('spawning', spawn_entities),
+    ('collision', resolve_collisions),
+]
+
+def run_headless(max_ticks=60 * FPS, policy=None, skin="default", seed=None):
+    """Simulate one run without a window; policy(state) returns the move for each tick"""
+    state = GameState(skin, seed=seed)
+    while not state.game_over and state.tick < max_ticks:
+        step(state, policy(state) if policy else 0)
+    return state
+
+# --- Replay Recording ---
+REPLAY_PATH = 'last_run.replay'
+REPLAY_MAGIC = b'ESRR'
+REPLAY_VERSION = 2  # 2: entities move by fractional pixels, so older runs no longer replay
+REPLAY_HEADER = struct.Struct('<4sHIIB')  # magic, version, seed, ticks, skin name length
+REPLAY_RUN = struct.Struct('<bH')  # move, number of ticks it was held
+
+class Replay:
+    """Seed, skin and per-tick moves of one recorded run"""
+    def __init__(self, seed, skin, moves=None):
+        self.seed = seed
+        self.skin = skin
+        self.moves = moves if moves is not None else []
+        
+    def record(self, move):
+        """Append the move used for the next tick"""
+        self.moves.append(move)
+        
+    def save(self, path=REPLAY_PATH):
+        """Write the replay as a header followed by run-length encoded moves"""
+        skin = self.skin.encode('utf-8')
+        chunks = [REPLAY_HEADER.pack(REPLAY_MAGIC, REPLAY_VERSION, self.seed, len(self.moves), len(skin)), skin]
+        i = 0
+        while i < len(self.moves):
+            move = self.moves[i]
+            run = 1
+            while i + run < len(self.moves) and self.moves[i + run] == move and run < 0xFFFF:
+                run += 1
+            chunks.append(REPLAY_RUN.pack(move, run))
+            i += run
+        with open(path, 'wb') as f:
+            f.write(b''.join(chunks))
+            
+    @classmethod
+    def load(cls, path=REPLAY_PATH):
+        """Read a replay written by save()"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, seed, ticks, skin_length = REPLAY_HEADER.unpack_from(data)
+        if magic != REPLAY_MAGIC or version != REPLAY_VERSION:
+            raise ValueError(f"{path} is not a version {REPLAY_VERSION} replay")
+        offset = REPLAY_HEADER.size
+        skin = data[offset:offset + skin_length].decode('utf-8')
+        moves = []
+        for move, run in REPLAY_RUN.iter_unpack(data[offset + skin_length:]):
+            moves.extend([move] * run)
+        if len(moves) != ticks:
+            raise ValueError(f"{path} is truncated")
+        return cls(seed, skin, moves)
+
+def run_replay_headless(replay):
+    """Re-simulate a recorded run without a window and return the final state"""
+    state = GameState(replay.skin, seed=replay.seed)
+    for move in replay.moves:
+        if state.game_over:
+            break
+        step(state, move)
+    return state
+
+# --- Main Game Function ---
+def run_game(seed=None, replay=None):
+    """Main game loop: feeds input to the simulation and renders the result"""
+    if replay is not None:
+        # Replays run on a throwaway profile so they never touch saved progress
+        state = GameState(replay.skin, seed=replay.seed)
+    else:
+        state = GameState(current_skin, stats, achievements_unlocked, seed)
+    recording = Replay(state.seed, state.player.skin)
+    profiler = FrameProfiler(tracing=bool(TRACE_PATH))
+    try:
+        return play_session(state, recording, profiler, replay)
+    finally:
+        if replay is None:
+            try:
+                recording.save()
+            except OSError as e:
+                print(f"Could not save replay: {e}")
+        if TRACE_PATH:
+            profiler.export_chrome_trace(TRACE_PATH)
+
+def play_session(state, recording, profiler, replay=None):
+    """Run the fixed-timestep loop for one game and return the next screen"""
+    screen = get_screen()
+    clock = get_clock()
+    get_sound_manager()
+    build_obstacle_frames()
+    state.track_motion = INTERPOLATE
+    particles = ParticleSystem(seed=state.seed)
     background = BackgroundManager()
     achievement_notification = AchievementNotification()
+    dirty_renderer = DirtyRenderer() if DIRTY_RECTS else None
+    move = 0
     
-    game_powerups_collected = 0
-    game_treasures_collected = 0
-    new_achievements = []
-    
-    game_running = True
+    # Fixed-timestep loop: the simulation always advances in TICK_MS steps and
+    # rendering happens once per loop, however long the frame actually took.
+    clock.tick()
+    accumulator = 0
     
-    while game_running:
-        clock.tick(FPS)
+    while not state.game_over:
+        frame_ms = clock.tick(MAX_RENDER_FPS)
+        # Cap the catch-up after a long stall instead of fast-forwarding
+        accumulator = min(accumulator + frame_ms, TICK_MS * MAX_TICKS_PER_FRAME)
+        profiler.begin_frame()
         
+        events_start = time.perf_counter()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 return "quit"
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_UP or event.key == pygame.K_w:
-                    player.speedy = -PLAYER_SPEED
+                    move = -1
                 elif event.key == pygame.K_DOWN or event.key == pygame.K_s:
-                    player.speedy = PLAYER_SPEED
+                    move = 1
                 elif event.key == pygame.K_ESCAPE:
                     return "menu"
+                elif event.key == pygame.K_F3:
+                    profiler.overlay_visible = not profiler.overlay_visible
+                    # Once the overlay has been opened, F4 has a trace to save
+                    profiler.tracing = True
+                elif event.key == pygame.K_F4:
+                    profiler.export_chrome_trace()
             elif event.type == pygame.KEYUP:
                 if event.key in [pygame.K_UP, pygame.K_w, pygame.K_DOWN, pygame.K_s]:
-                    player.speedy = 0
-        
-        player.update()
-        scroll_speed += SPEED_INCREASE_RATE * 0.01
-        
-        # Calculate level
-        new_level = (score // 300) + 1
-        if new_level > level:
-            level = new_level
-            background.change_theme(level)
-            sound_manager.play('levelup')
-            if level > stats['max_speed_level']:
-                stats['max_speed_level'] = level
-        
-        for obstacle in obstacles:
-            obstacle.update(scroll_speed)
-        for reward in rewards:
-            reward.update(scroll_speed, player)
-        for powerup in powerups:
-            powerup.update(scroll_speed)
-        for boss in bosses:
-            boss.update()
-        for projectile in boss_projectiles:
-            projectile.update()
-        particles.update()
-        achievement_notification.update()
-        
-        now = pygame.time.get_ticks()
-        if not boss_active and now - last_obstacle_spawn > random.randint(SPAWN_INTERVAL_MIN, SPAWN_INTERVAL_MAX):
-            last_obstacle_spawn = now
-            obstacle_type = random.choice(["asteroid", "alien", "black_hole", "debris"])
-            new_obstacle = Obstacle(obstacle_type)
-            all_sprites.add(new_obstacle)
-            obstacles.add(new_obstacle)
-        
-        if now - last_reward_spawn > random.randint(80, 150):
-            last_reward_spawn = now
-            reward_type = random.choice(["star", "star", "planet", "treasure"])
-            new_reward = Reward(reward_type)
-            all_sprites.add(new_reward)
-            rewards.add(new_reward)
-        
-        if now - last_powerup_spawn > random.randint(400, 600):
-            last_powerup_spawn = now
-            powerup_type = random.choice(["shield", "magnet", "speed"])
-            new_powerup = PowerUp(powerup_type)
-            all_sprites.add(new_powerup)
-            powerups.add(new_powerup)
-        
-        if score >= next_boss_score and not boss_active:
-            boss_type = boss_types[current_boss_type % len(boss_types)]
-            boss = Boss(boss_type)
-            all_sprites.add(boss)
-            bosses.add(boss)
-            boss_active = True
-            current_boss_type += 1
-            sound_manager.play('boss_appear')
-        
-        for boss in bosses:
-            if boss.shoot_timer > 90:
-                boss.shoot_timer = 0
-                projectile = BossProjectile(boss.rect.left, boss.rect.centery)
-                all_sprites.add(projectile)
-                boss_projectiles.add(projectile)
-        
-        if not player.shield_active and not player.invincible:
-            hits = pygame.sprite.spritecollide(player, obstacles, False)
-            if hits:
-                sound_manager.play('explosion')
-                create_particles(player.rect.centerx, player.rect.centery, RED, particles)
-                game_running = False
-        
-        if not player.shield_active and not player.invincible:
-            proj_hits = pygame.sprite.spritecollide(player, boss_projectiles, True)
-            if proj_hits:
-                sound_manager.play('explosion')
-                create_particles(player.rect.centerx, player.rect.centery, RED, particles)
-                game_running = False
-        
-        reward_hits = pygame.sprite.spritecollide(player, rewards, True)
-        for reward in reward_hits:
-            score += reward.points
-            coins_earned += reward.coin_value
-            stats['total_coins'] += reward.coin_value
-            sound_manager.play('coin')
-            create_particles(reward.rect.centerx, reward.rect.centery, YELLOW, particles)
-            
-            if reward.type == "treasure":
-                game_treasures_collected += 1
-        
-        powerup_hits = pygame.sprite.spritecollide(player, powerups, True)
-        for powerup in powerup_hits:
-            if powerup.power_type == "shield":
-                player.activate_shield()
-            elif powerup.power_type == "magnet":
-                player.activate_magnet()
-            elif powerup.power_type == "speed":
-                player.activate_speed_boost()
-            sound_manager.play('powerup')
-            create_particles(powerup.rect.centerx, powerup.rect.centery, PURPLE, particles)
-            game_powerups_collected += 1
-            stats['powerups_collected'] += 1
-        
-        if player.shield_active:
-            boss_hits = pygame.sprite.spritecollide(player, bosses, False)
-            for boss in boss_hits:
-                if boss.take_damage():
-                    score += 500
-                    coins_earned += 50
-                    stats['bosses_defeated'] += 1
-                    sound_manager.play('explosion')
-                    create_particles(boss.rect.centerx, boss.rect.centery, GOLD, particles)
-                    boss_active = False
-                    next_boss_score = score + BOSS_SPAWN_SCORE
-        
-        # Check achievements
-        if check_achievement('first_blood', score):
-            new_achievements.append('first_blood')
-            achievement_notification.show('first_blood')
-        if check_achievement('survivor', score):
-            new_achievements.append('survivor')
-            achievement_notification.show('survivor')
-        if check_achievement('millionaire', score):
-            new_achievements.append('millionaire')
-            achievement_notification.show('millionaire')
-        if check_achievement('coin_collector', stats['total_coins']):
-            new_achievements.append('coin_collector')
-            achievement_notification.show('coin_collector')
-        if check_achievement('boss_slayer', stats['bosses_defeated']):
-            new_achievements.append('boss_slayer')
-            achievement_notification.show('boss_slayer')
-        if check_achievement('power_user', stats['powerups_collected']):
-            new_achievements.append('power_user')
-            achievement_notification.show('power_user')
-        if check_achievement('treasure_hunter', game_treasures_collected):
-            new_achievements.append('treasure_hunter')
-            achievement_notification.show('treasure_hunter')
-        if check_achievement('speed_demon', level):
-            new_achievements.append('speed_demon')
-            achievement_notification.show('speed_demon')
-        
-        # Drawing
-        background.draw(screen, scroll_speed)
-        
-        if player.shield_active:
-            pygame.draw.circle(screen, CYAN, player.rect.center, PLAYER_SIZE, 2)
-        
-        all_sprites.draw(screen)
-        particles.draw(screen)
-        
-        for boss in bosses:
-            bar_width = 60
-            bar_height = 6
-            fill = (boss.health / boss.max_health) * bar_width
-            bar_x = boss.rect.centerx - bar_width // 2
-            bar_y = boss.rect.top - 15
-            pygame.draw.rect(screen, RED, (bar_x, bar_y, bar_width, bar_height))
-            pygame.draw.rect(screen, GREEN, (bar_x, bar_y, fill, bar_height))
-        
-        draw_text(f"Score: {score}", small_font, WHITE, SCREEN_WIDTH // 2, 10)
-        draw_text(f"Level: {level}", tiny_font, CYAN, 650, 10)
-        draw_text(f"Coins: {coins_earned}", tiny_font, GOLD, 100, 10)
-        player.draw_powerup_indicators(screen)
-        
-        if boss_active:
-            draw_text("BOSS FIGHT!", small_font, RED, SCREEN_WIDTH // 2, SCREEN_HEIGHT - 40)
-        
-        achievement_notification.draw(screen)
+                    move = 0
+        profiler.record('events', events_start, time.perf_counter())
         
-        pygame.display.flip()
+        while accumulator >= TICK_MS and not state.game_over:
+            accumulator -= TICK_MS
+            if replay is not None:
+                if state.tick >= len(replay.moves):
+                    return "menu"
+                move = replay.moves[state.tick]
+            recording.record(move)
+            step(state, move, profiler)
+            profiler.time('effects', update_effects, state, particles, background, achievement_notification)
+        
+        alpha = accumulator / TICK_MS if INTERPOLATE else 1
+        if dirty_renderer:
+            dirty_renderer.draw(screen, state, background, particles, achievement_notification, alpha, frame_ms / TICK_MS, profiler)
+        else:
+            draw_game(screen, state, background, particles, achievement_notification, alpha, frame_ms / TICK_MS, profiler)
+            profiler.time('present', pygame.display.flip)
+        profiler.end_frame()
     
-    save_game_data()
-    return show_game_over_screen(score, coins_earned, level, new_achievements)
+    if replay is not None:
+        return "menu"
+    run = run_record(state)
+    get_run_history().record(run)
+    # show_game_over_screen saves once the run's coins are banked
+    return show_game_over_screen(state.score, state.coins_earned, state.level, state.new_achievements, run)
+
+def handle_sim_events(state, particles, background, achievement_notification, play_sounds=True):
+    """Apply the sounds and effects the last simulation tick asked for"""
+    for sim_event in state.events:
+        if sim_event[0] == 'sound':
+            if play_sounds:
+                play_sound(sim_event[1])
+        elif sim_event[0] == 'particles':
+            particles.emit(sim_event[1], sim_event[2], sim_event[3])
+        elif sim_event[0] == 'level':
+            background.change_theme(sim_event[1])
+        elif sim_event[0] == 'achievement':
+            achievement_notification.show(sim_event[1])
+
+def update_effects(state, particles, background, achievement_notification, play_sounds=True):
+    """Run the renderer-side effects for one simulation tick"""
+    handle_sim_events(state, particles, background, achievement_notification, play_sounds)
+    particles.update()
+    achievement_notification.update()
+
+def interpolated_center(sprite, alpha):
+    """Sprite center blended between the previous and current tick"""
+    x, y = sprite.rect.center
+    previous = getattr(sprite, 'previous_center', None)
+    if previous is None or alpha >= 1:
+        return x, y
+    return (int(previous[0] + (x - previous[0]) * alpha),
+            int(previous[1] + (y - previous[1]) * alpha))
+
+def draw_sprites(surface, sprites, alpha=1):
+    """Draw sprites at positions interpolated between simulation ticks"""
+    if alpha >= 1:
+        sprites.draw(surface)
+        return
+    blits = []
+    for sprite in sprites:
+        image = sprite.image
+        x, y = interpolated_center(sprite, alpha)
+        blits.append((image, (x - image.get_width() // 2, y - image.get_height() // 2)))
+    surface.blits(blits, False)
+
+def draw_game(surface, state, background, particles, achievement_notification, alpha=1, frame_ticks=1, profiler=None):
+    """Render one frame of the game state"""
+    # alpha places the frame between the last two ticks; frame_ticks is how many
+    # ticks the frame covers, so the background scrolls at the same speed at any fps
+    timed(profiler, 'background', background.draw, surface, state.scroll_speed * frame_ticks)
+    timed(profiler, 'sprites', draw_entities, surface, state, particles, alpha)
+    timed(profiler, 'hud', draw_hud, surface, state, achievement_notification)
+    if profiler and profiler.overlay_visible:
+        profiler.draw_overlay(surface, state, particles)
+
+def draw_entities(surface, state, particles, alpha=1):
+    """Draw the player, entities, particles and boss health bars"""
+    player = state.player
+    if player.shield_active:
+        pygame.draw.circle(surface, CYAN, interpolated_center(player, alpha), PLAYER_SIZE, 2)
+    
+    state.entities.draw(surface, alpha)
+    draw_sprites(surface, state.all_sprites, alpha)
+    particles.draw(surface)
+    
+    for boss in state.bosses:
+        bar_width = 60
+        bar_height = 6
+        fill = (boss.health / boss.max_health) * bar_width
+        bar_x = boss.rect.centerx - bar_width // 2
+        bar_y = boss.rect.top - 15
+        pygame.draw.rect(surface, RED, (bar_x, bar_y, bar_width, bar_height))
+        pygame.draw.rect(surface, GREEN, (bar_x, bar_y, fill, bar_height))
+
+def draw_hud(surface, state, achievement_notification):
+    """Draw the score, level, coins, power-up and boss indicators"""
+    draw_counter("Score: ", state.score, get_font('small'), WHITE, SCREEN_WIDTH // 2, 10, surface)
+    draw_counter("Level: ", state.level, get_font('tiny'), CYAN, 650, 10, surface)
+    draw_counter("Coins: ", state.coins_earned, get_font('tiny'), GOLD, 100, 10, surface)
+    state.player.draw_powerup_indicators(surface)
+    
+    if state.boss_active:
+        draw_text("BOSS FIGHT!", get_font('small'), RED, SCREEN_WIDTH // 2, SCREEN_HEIGHT - 40, surface)
+    
+    achievement_notification.draw(surface)
+
+# --- Dirty-Rect Rendering ---
+SCREEN_RECT = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+# Screen regions the HUD draws into, so they can be erased and pushed
+HUD_TOP_RECT = pygame.Rect(0, 0, SCREEN_WIDTH, 45)
+HUD_INDICATOR_RECT = pygame.Rect(0, 55, 150, 80)
+HUD_BOSS_RECT = pygame.Rect(0, SCREEN_HEIGHT - 45, SCREEN_WIDTH, 45)
+HUD_ACHIEVEMENT_RECT = pygame.Rect(SCREEN_WIDTH // 2 - 180, 85, 360, 90)
+
+class DirtyRenderer:
+    """Redraws only what changed and pushes those regions with display.update"""
+    # The background is rendered into a cached layer that only scrolls every
+    # DIRTY_BACKGROUND_TICKS; in between, each frame erases last frame's sprites
+    # and HUD by copying from the layer, then redraws them at their new positions.
+    def __init__(self):
+        self.layer = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.theme = None
+        self.pending_ticks = 0
+        self.previous_rects = []
+        
+    def draw(self, screen, state, background, particles, achievement_notification, alpha=1, frame_ticks=1, profiler=None):
+        """Render one frame and update the display"""
+        self.pending_ticks += frame_ticks
+        if self.theme != background.current_theme or self.pending_ticks >= DIRTY_BACKGROUND_TICKS:
+            timed(profiler, 'background', background.draw, self.layer, state.scroll_speed * self.pending_ticks)
+            self.theme = background.current_theme
+            self.pending_ticks = 0
+            screen.blit(self.layer, (0, 0))
+            self.draw_foreground(screen, state, particles, achievement_notification, alpha, profiler)
+            self.previous_rects = self.dirty_rects(state, particles, achievement_notification, profiler)
+            timed(profiler, 'present', pygame.display.flip)
+            return
+        
+        for rect in self.previous_rects:
+            screen.blit(self.layer, rect, rect)
+        self.draw_foreground(screen, state, particles, achievement_notification, alpha, profiler)
+        rects = self.dirty_rects(state, particles, achievement_notification, profiler)
+        timed(profiler, 'present', pygame.display.update, self.previous_rects + rects)
+        self.previous_rects = rects
+        
+    def draw_foreground(self, screen, state, particles, achievement_notification, alpha, profiler):
+        timed(profiler, 'sprites', draw_entities, screen, state, particles, alpha)
+        timed(profiler, 'hud', draw_hud, screen, state, achievement_notification)
+        if profiler and profiler.overlay_visible:
+            profiler.draw_overlay(screen, state, particles)
+        
+    def dirty_rects(self, state, particles, achievement_notification, profiler=None):
+        """Every region draw_entities, draw_hud and the profiler overlay may have drawn this frame"""
+        rects = [HUD_TOP_RECT, HUD_INDICATOR_RECT]
+        if profiler and profiler.overlay_visible:
+            rects.append(PROFILER_OVERLAY_RECT)
+        for sprite in state.all_sprites:
+            rect = sprite.rect
+            previous = getattr(sprite, 'previous_center', None)
+            if previous is not None:
+                rect = rect.union(rect.copy().move(previous[0] - rect.centerx, previous[1] - rect.centery))
+            rects.append(rect)
+        rects.extend(state.entities.dirty_rects())
+        if state.player.shield_active:
+            rects.append(state.player.rect.inflate(PLAYER_SIZE * 2 + 4, PLAYER_SIZE * 2 + 4))
+        for boss in state.bosses:
+            rects.append(pygame.Rect(boss.rect.centerx - 30, boss.rect.top - 15, 60, 6))
+        if state.boss_active:
+            rects.append(HUD_BOSS_RECT)
+        if achievement_notification.active:
+            rects.append(HUD_ACHIEVEMENT_RECT)
+        particle_rect = particles.bounds()
+        if particle_rect:
+            rects.append(particle_rect)
+        return [rect.clip(SCREEN_RECT) for rect in rects if rect.colliderect(SCREEN_RECT)]
+
+# --- Benchmarks ---
+BENCHMARK_TICKS = 1800
+BENCHMARK_SEED = 1234
+BENCHMARK_ALLOC_TICKS = 300
+BENCHMARK_TOLERANCE = 0.15  # allowed p95 frame time growth before --compare fails
+
+def bench_theme(theme):
+    """Scenario hook that keeps the background on one theme"""
+    def setup(state, background):
+        background.current_theme = theme
+    return setup
+
+def bench_boss_fight(state, background):
+    state.next_boss_score = 0
+
+def bench_reward_flood(state, background):
+    state.player.magnet_active = True
+    state.player.magnet_timer = BENCHMARK_TICKS * 2
+    entities = state.entities
+    while entities.count(REWARD) < 300:
+        slot = spawn_scroller(state, REWARD, state.rng.choice(REWARD_SPAWN_TABLE))
+        entities.x[slot] = entities.previous_x[slot] = state.rng.randint(0, SCREEN_WIDTH)
+
+def bench_max_speed(state, background):
+    state.scroll_speed = 20
+
+# name -> (called once before the run, called before every tick)
+BENCHMARK_SCENARIOS = {
+    'theme_space': (None, bench_theme("space")),
+    'theme_nebula': (None, bench_theme("nebula")),
+    'theme_asteroid_field': (None, bench_theme("asteroid_field")),
+    'theme_deep_space': (None, bench_theme("deep_space")),
+    'boss_fight': (bench_boss_fight, None),
+    'magnet_reward_flood': (None, bench_reward_flood),
+    'max_scroll_speed': (None, bench_max_speed),
+}
+
+def benchmark_move(state):
+    """Sweep the player up and down so it crosses the whole screen"""
+    return 1 if (state.tick // 60) % 2 else -1
+
+def benchmark_frames(name, ticks, profiler=None):
+    """Run a scenario one tick and one frame at a time, timing phases when a profiler is given"""
+    setup, per_tick = BENCHMARK_SCENARIOS[name]
+    screen = get_screen()
+    random.seed(BENCHMARK_SEED)
+    np.random.seed(BENCHMARK_SEED)
+    state = GameState(seed=BENCHMARK_SEED)
+    particles = ParticleSystem(seed=BENCHMARK_SEED)
+    background = BackgroundManager()
+    notification = AchievementNotification()
+    if setup:
+        setup(state, background)
+    
+    for _ in range(ticks):
+        # The player can't die during a benchmark, so every scenario runs its full length
+        state.player.invincible = True
+        state.player.invincible_timer = 2
+        if per_tick:
+            per_tick(state, background)
+        if profiler:
+            profiler.begin_frame()
+        step(state, benchmark_move(state), profiler)
+        timed(profiler, 'effects', update_effects, state, particles, background, notification, False)
+        draw_game(screen, state, background, particles, notification, profiler=profiler)
+        if profiler:
+            profiler.end_frame()
+        yield
+
+def run_benchmark_scenario(name, ticks=BENCHMARK_TICKS):
+    """Time one scenario, then measure its per-frame allocations in a second pass"""
+    profiler = FrameProfiler(history=ticks)
+    for _ in benchmark_frames(name, ticks, profiler):
+        pass
+    
+    # tracemalloc slows everything down, so allocations get their own shorter
+    # pass; each sample is the most memory a frame allocated above its start
+    alloc_kb = []
+    tracemalloc.start()
+    try:
+        frame_start = tracemalloc.get_traced_memory()[0]
+        for _ in benchmark_frames(name, min(ticks, BENCHMARK_ALLOC_TICKS)):
+            current, peak = tracemalloc.get_traced_memory()
+            alloc_kb.append((peak - frame_start) / 1024)
+            tracemalloc.reset_peak()
+            frame_start = current
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        'frames': ticks,
+        'frame_ms': percentiles(profiler.frame_times),
+        'phases_ms': profiler.summary(),
+        # The first sample includes scenario setup
+        'alloc_peak_kb_per_frame': percentiles(alloc_kb[1:] or [0]),
+    }
+
+def run_benchmarks(out_path, scenarios=None, ticks=BENCHMARK_TICKS, compare_path=None):
+    """Run benchmark scenarios headless, save the report as JSON and optionally compare"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    get_screen()
+    build_obstacle_frames()
+    
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'ticks': ticks,
+            'seed': BENCHMARK_SEED,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'scenarios': {},
+    }
+    for name in scenarios or BENCHMARK_SCENARIOS:
+        result = run_benchmark_scenario(name, ticks)
+        report['scenarios'][name] = result
+        frame = result['frame_ms']
+        print(f"{name:22} p50 {frame['p50']:7.3f} ms  p95 {frame['p95']:7.3f} ms  p99 {frame['p99']:7.3f} ms  "
+              f"alloc p50 {result['alloc_peak_kb_per_frame']['p50']:7.1f} KB")
+    
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {out_path}")
+    
+    if compare_path:
+        return compare_benchmarks(compare_path, report)
+    return True
+
+def compare_benchmarks(baseline_path, report):
+    """Print p95 frame time changes against a saved report; False if any regressed"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    ok = True
+    for name, result in report['scenarios'].items():
+        if name not in baseline['scenarios']:
+            continue
+        before = baseline['scenarios'][name]['frame_ms']['p95']
+        after = result['frame_ms']['p95']
+        change = (after - before) / before if before else 0
+        regressed = change > BENCHMARK_TOLERANCE
+        ok = ok and not regressed
+        print(f"{name:22} p95 {before:7.3f} -> {after:7.3f} ms ({change:+.1%}){'  REGRESSION' if regressed else ''}")
+    return ok
+
+# --- Balance Sweep ---
+SWEEP_GAMES = 200  # games per parameter combination
+SWEEP_SEED = 1
+SWEEP_MAX_SECONDS = 300  # games still alive after this long count as survivors
+SWEEP_CHUNK = 25  # games per worker task
+SWEEP_CURVE_STEP = 10  # seconds between survival curve points
+# Bosses never scroll on screen (Boss.update ignores speedx), so the player can't
+# reach one and boss health changes no outcome; only when a boss arrives matters,
+# because obstacles stop spawning while it is active
+SWEEP_GRID = {
+    'SPEED_INCREASE_RATE': [0.005, 0.01, 0.02],
+    'SPAWN_INTERVAL_MIN': [120, 160, 200],
+    'BOSS_SPAWN_SCORE': [300, 500, 800],
+}
+TUNABLE_PARAMETERS = ['SPAWN_INTERVAL_MIN', 'SPAWN_INTERVAL_MAX', 'SPEED_INCREASE_RATE', 'INITIAL_SCROLL_SPEED',
+                      'PLAYER_SPEED', 'BOSS_SPAWN_SCORE', 'BOSS_HEALTH_SCALE', 'BOSS_SPEED_SCALE']
+BOT_LOOKAHEAD = 220  # pixels ahead the dodging bot watches
+BOT_MARGIN = 12
+
+def idle_policy(state):
+    return 0
+
+def dodge_policy(state):
+    """Steer away from the nearest obstacle or projectile in the player's lane, else drift to the middle"""
+    player = state.player.rect
+    threat = None
+    hazards = state.entities.rects(OBSTACLE) + [sprite.rect for sprite in itertools.chain(state.boss_projectiles, state.bosses)]
+    for rect in hazards:
+        gap = rect.left - player.right
+        if rect.right < player.left or gap > BOT_LOOKAHEAD:
+            continue
+        if rect.bottom + BOT_MARGIN < player.top or rect.top - BOT_MARGIN > player.bottom:
+            continue
+        if threat is None or gap < threat[0]:
+            threat = (gap, rect)
+    if threat:
+        rect = threat[1]
+        if rect.centery >= player.centery:
+            return -1 if rect.top - player.height - BOT_MARGIN > 0 else 1
+        return 1 if rect.bottom + player.height + BOT_MARGIN < SCREEN_HEIGHT else -1
+    offset = player.centery - SCREEN_HEIGHT // 2
+    return 0 if abs(offset) < PLAYER_SPEED else (-1 if offset > 0 else 1)
+
+BOT_POLICIES = {
+    'dodge': dodge_policy,
+    'sweep': benchmark_move,
+    'idle': idle_policy,
+}
+
+def apply_tuning(params):
+    """Override balance constants in this process"""
+    for name, value in params.items():
+        if name not in TUNABLE_PARAMETERS:
+            raise ValueError(f"{name} is not tunable; choose from {', '.join(TUNABLE_PARAMETERS)}")
+        globals()[name] = value
+
+def sweep_configs(grid):
+    """Every combination of the grid's values, skipping ones with an empty spawn interval"""
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = dict(zip(names, values))
+        if params.get('SPAWN_INTERVAL_MIN', SPAWN_INTERVAL_MIN) <= params.get('SPAWN_INTERVAL_MAX', SPAWN_INTERVAL_MAX):
+            yield params
+
+def sweep_worker(task):
+    """Play a chunk of games with one set of parameters; runs in a worker process"""
+    index, params, policy_name, seeds, max_ticks = task
+    apply_tuning(params)
+    policy = BOT_POLICIES[policy_name]
+    results = []
+    for seed in seeds:
+        state = run_headless(max_ticks, policy, seed=seed)
+        results.append((state.tick, state.score, state.level, state.game_bosses_defeated))
+    return index, results
+
+def summarize_sweep(params, results, max_ticks):
+    """Survival curve and score statistics for one parameter combination"""
+    ticks = np.array([result[0] for result in results])
+    scores = [result[1] for result in results]
+    curve_ticks = np.arange(0, max_ticks + 1, SWEEP_CURVE_STEP * FPS)
+    return {
+        'params': params,
+        'games': len(results),
+        'survival_s': percentiles(ticks / FPS),
+        'survivors': round(float(np.mean(ticks >= max_ticks)), 4),
+        'score': percentiles(scores),
+        'levels': percentiles([result[2] for result in results]),
+        'boss_kills_mean': round(float(np.mean([result[3] for result in results])), 3),
+        # Fraction of games still running at each SWEEP_CURVE_STEP seconds
+        'curve': [round(float(np.mean(ticks >= t)), 4) for t in curve_ticks],
+    }
+
+def run_sweep(out_path, grid=None, games=SWEEP_GAMES, policy='dodge', workers=None, max_seconds=SWEEP_MAX_SECONDS):
+    """Play games for every parameter combination across processes and save survival curves"""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+    configs = list(sweep_configs(grid or SWEEP_GRID))
+    max_ticks = max_seconds * FPS
+    # Every combination plays the same seeds, so differences come from the parameters
+    seeds = list(range(SWEEP_SEED, SWEEP_SEED + games))
+    tasks = [(index, params, policy, seeds[start:start + SWEEP_CHUNK], max_ticks)
+             for index, params in enumerate(configs) for start in range(0, games, SWEEP_CHUNK)]
+    
+    results = [[] for _ in configs]
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as executor:
+        for done, (index, chunk) in enumerate(executor.map(sweep_worker, tasks, chunksize=4), 1):
+            results[index].extend(chunk)
+            if done % 50 == 0 or done == len(tasks):
+                print(f"\r{done}/{len(tasks)} tasks", end='', flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"\n{len(configs) * games} games in {elapsed:.1f} s")
+    
+    summaries = [summarize_sweep(params, chunk, max_ticks) for params, chunk in zip(configs, results)]
+    for summary in sorted(summaries, key=lambda s: s['survival_s']['p50']):
+        params = ' '.join(f"{name}={value}" for name, value in summary['params'].items())
+        print(f"survival p50 {summary['survival_s']['p50']:6.1f} s  score p50 {summary['score']['p50']:7.0f}  "
+              f"bosses {summary['boss_kills_mean']:5.2f}  {params}")
+    
+    report = {
+        'meta': {
+            'policy': policy,
+            'games': games,
+            'seed': SWEEP_SEED,
+            'max_seconds': max_seconds,
+            'curve_step_s': SWEEP_CURVE_STEP,
+            'elapsed_s': round(elapsed, 2),
+            'workers': workers or os.cpu_count(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'configs': summaries,
+    }
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Saved {out_path}")
+
+def parse_sweep_param(text):
+    """NAME=V1,V2,... from the command line"""
+    name, _, values = text.partition('=')
+    if name not in TUNABLE_PARAMETERS or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=V1,V2 with NAME one of {', '.join(TUNABLE_PARAMETERS)}")
+    kind = type(globals()[name])
+    return name, [kind(value) for value in values.split(',')]
 
 # --- Main Program ---
+def parse_seed(text):
+    """A run seed from the command line; replays store it as an unsigned 32-bit number"""
+    seed = int(text)
+    if not 0 <= seed < 2 ** 32:
+        raise argparse.ArgumentTypeError(f"seed must be between 0 and {2 ** 32 - 1}")
+    return seed
+
+def parse_args(argv=None):
+    """Command-line options"""
+    parser = argparse.ArgumentParser(description="Enhanced Space Runner")
+    parser.add_argument('--seed', type=parse_seed, help="seed every run with this value")
+    parser.add_argument('--replay', metavar='PATH', help="play back a recorded run, e.g. " + REPLAY_PATH)
+    parser.add_argument('--headless', action='store_true', help="with --replay, re-simulate without a window and report timing")
+    parser.add_argument('--benchmark', metavar='OUT.json', help="run the benchmark scenarios headless and save a report")
+    parser.add_argument('--scenario', action='append', choices=list(BENCHMARK_SCENARIOS), help="benchmark only this scenario (repeatable)")
+    parser.add_argument('--ticks', type=int, default=BENCHMARK_TICKS, help="frames per benchmark scenario")
+    parser.add_argument('--compare', metavar='BASELINE.json', help="with --benchmark, fail if p95 frame time regressed")
+    parser.add_argument('--sweep', metavar='OUT.json', help="play bot games across parameter combinations in parallel and save survival curves")
+    parser.add_argument('--param', action='append', type=parse_sweep_param, metavar='NAME=V1,V2',
+                        help="with --sweep, values to try for a parameter (repeatable; replaces the default grid)")
+    parser.add_argument('--games', type=int, default=SWEEP_GAMES, help="games per parameter combination")
+    parser.add_argument('--policy', choices=list(BOT_POLICIES), default='dodge', help="bot that plays the sweep games")
+    parser.add_argument('--workers', type=int, help="sweep worker processes (default: one per CPU)")
+    parser.add_argument('--max-seconds', type=int, default=SWEEP_MAX_SECONDS, help="simulated seconds before a sweep game counts as survived")
+    parser.add_argument('--profile-startup', action='store_true', help="print startup phase timings once the menu is up, then exit")
+    parser.add_argument('--trace', metavar='PATH', help="write each game's frame timings as a Chrome trace JSON file")
+    parser.add_argument('--dirty-rects', action='store_true', help="update only changed screen regions (for slow or software-rendered displays)")
+    return parser.parse_args(argv)
+
 def main():
     """Main program loop"""
-    load_game_data()
+    global DIRTY_RECTS, TRACE_PATH
+    args = parse_args()
+    DIRTY_RECTS = DIRTY_RECTS or args.dirty_rects
+    TRACE_PATH = args.trace or TRACE_PATH
+    if args.benchmark:
+        if not run_benchmarks(args.benchmark, args.scenario, args.ticks, args.compare):
+            sys.exit(1)
+        return
+    if args.sweep:
+        run_sweep(args.sweep, dict(args.param) if args.param else None, args.games, args.policy, args.workers, args.max_seconds)
+        return
+    if args.replay and args.headless:
+        replay = Replay.load(args.replay)
+        start = time.perf_counter()
+        state = run_replay_headless(replay)
+        elapsed = time.perf_counter() - start
+        print(f"seed {replay.seed}: {state.tick} ticks, score {state.score}, level {state.level}, "
+              f"{state.tick / elapsed:.0f} ticks/s")
+        return
+    
+    startup_profiler.exit_after_first_frame = args.profile_startup
+    with startup_profiler.phase('load save'):
+        load_game_data()
+    
+    if args.replay:
+        run_game(replay=Replay.load(args.replay))
+        flush_saves()
+        pygame.quit()
+        return
     
     while True:
         action = show_main_menu()
@@ -1058,7 +2722,7 @@ def main():
         if action == "quit":
             break
         elif action == "play":
-            result = run_game()
+            result = run_game(args.seed)
             if result == "quit":
                 break
         elif action == "skins":
@@ -1066,7 +2730,12 @@ def main():
         elif action == "achievements":
             show_achievements_screen()
     
+    flush_saves()
     pygame.quit()
+    if args.profile_startup:
+        print(startup_profiler.report())
+
+startup_profiler.record('import', time.perf_counter() - IMPORT_START)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file